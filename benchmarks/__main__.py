@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import edn_format
+
+from typing import Callable, Dict, List
+from zipfile import ZipFile
+
+from acctext import AcceleratedText
+from benchmarks.server import FakeServer
+
+
+def measure(name: str, fn: Callable[[], int], repeat: int = 1) -> Dict:
+    latencies = []
+    operations = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        operations += fn()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    return {"name": name,
+            "operations": operations,
+            "throughput": operations / elapsed,
+            "p50": statistics.median(latencies),
+            "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+            "peak_memory": peak}
+
+
+def archive_items(path: str) -> int:
+    with ZipFile(path, 'r') as file:
+        return sum(len(list(edn_format.loads(file.read(name).decode('utf-8')))) if name.endswith('.edn') else 1
+                   for name in file.namelist() if name != 'manifest.json')
+
+
+def seed(at: AcceleratedText, dictionary_size: int, document_plans: int, rows: int, cols: int):
+    at.create_dictionary_items({"key": f'word{i}', "category": "N", "forms": [f'word{i}', f'word{i}s']}
+                               for i in range(dictionary_size))
+    for i in range(document_plans):
+        at.create_document_plan(f'plan-{i}', f'plan-{i}', f'Plan {i}', 'Document', [], '<xml></xml>',
+                                {"type": "Document-plan", "segments": [], "srcId": str(i)})
+    at.upload_rows('bench.csv', [f'field_{j}' for j in range(cols)],
+                   ([f'{i}-{j}' for j in range(cols)] for i in range(rows)))
+
+
+def run(args) -> List[Dict]:
+    results = []
+    with FakeServer(latency=args.latency, realisation_time=args.realisation_time,
+                    variant_size=args.variant_size) as server, AcceleratedText(server.url) as at:
+        rows = [{"product": f'product-{i}', "color": "red", "size": i % 7} for i in range(args.rows)]
+        seed(at, args.dictionary_size, args.document_plans, args.data_file_rows, args.data_file_cols)
+        selected = set(args.only or [])
+
+        def wanted(name: str) -> bool:
+            return not selected or name in selected
+
+        if wanted('generate'):
+            results.append(measure('generate', lambda: bool(at.generate('Plan 0', rows[0])), repeat=args.requests))
+        if wanted('generate_bulk'):
+            results.append(measure('generate_bulk', lambda: sum(1 for _ in at.generate_bulk('Plan 0', rows)),
+                                   repeat=args.bulk_jobs))
+        if wanted('get_data_file'):
+            results.append(measure('get_data_file', lambda: len(at.get_data_file('bench.csv')['rows']), repeat=3))
+        if wanted('dictionary'):
+            items = [{"key": f'load{i}', "category": "N", "forms": [f'load{i}']} for i in range(args.dictionary_size)]
+            results.append(measure('dictionary', lambda: len(at.create_dictionary_items(items))))
+        if wanted('export_state') or wanted('restore_state'):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'state.zip')
+                results.append(measure('export_state', lambda: at.export_state(path) or 1))
+                if wanted('restore_state'):
+                    items = archive_items(path)
+                    results.append(measure('restore_state', lambda: items - len(at.restore_state(path))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark acctext against an in-process Accelerated Text stand-in')
+    parser.add_argument('--latency', type=float, default=0.0, help='added server latency per request, seconds')
+    parser.add_argument('--realisation-time', type=float, default=0.0, help='time until a result is ready, seconds')
+    parser.add_argument('--variant-size', type=int, default=64, help='characters per generated variant')
+    parser.add_argument('--requests', type=int, default=500, help='sequential generate calls')
+    parser.add_argument('--rows', type=int, default=2000, help='rows per generate_bulk job')
+    parser.add_argument('--bulk-jobs', type=int, default=10, help='sequential generate_bulk jobs')
+    parser.add_argument('--dictionary-size', type=int, default=2000)
+    parser.add_argument('--document-plans', type=int, default=50)
+    parser.add_argument('--data-file-rows', type=int, default=20000)
+    parser.add_argument('--data-file-cols', type=int, default=10)
+    parser.add_argument('--only', nargs='*', help='benchmarks to run (default: all)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON lines')
+    args = parser.parse_args()
+    results = run(args)
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+    print(f'{"benchmark":<15} {"ops":>8} {"ops/s":>10} {"p50 ms":>10} {"p99 ms":>10} {"peak MB":>9}')
+    for r in results:
+        print(f'{r["name"]:<15} {r["operations"]:>8} {r["throughput"]:>10.1f} {r["p50"] * 1000:>10.2f} '
+              f'{r["p99"] * 1000:>10.2f} {r["peak_memory"] / 2 ** 20:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
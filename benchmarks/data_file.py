@@ -0,0 +1,39 @@
+import random
+import timeit
+
+from typing import Dict
+
+from acctext import transforms
+
+
+def legacy_data_file(x: Dict) -> Dict:
+    return {"id": x['id'],
+            "filename": x['fileName'],
+            "header": x['fieldNames'],
+            "rows": [[field['value'] for field in sorted(record['fields'],
+                                                         key=lambda f: x['fieldNames'].index(f['fieldName']))]
+                     for record in x['records']]}
+
+
+def make_data_file(rows: int, cols: int) -> Dict:
+    header = [f'field_{i}' for i in range(cols)]
+    records = []
+    for i in range(rows):
+        fields = [{"id": f'{i}-{j}', "fieldName": name, "value": str(i * j)} for j, name in enumerate(header)]
+        random.shuffle(fields)
+        records.append({"id": str(i), "fields": fields})
+    return {"id": "bench.csv", "fileName": "bench.csv", "fieldNames": header, "records": records}
+
+
+def main():
+    print(f'{"rows":>8} {"cols":>6} {"legacy":>10} {"data_file":>10} {"columns":>10}')
+    for rows, cols in [(10000, 5), (10000, 50), (2000, 200)]:
+        x = make_data_file(rows, cols)
+        assert legacy_data_file(x)['rows'] == transforms.data_file(x)['rows']
+        timings = [min(timeit.repeat(lambda: f(x), number=1, repeat=3))
+                   for f in (legacy_data_file, transforms.data_file, transforms.data_file_columns)]
+        print(f'{rows:>8} {cols:>6} ' + ' '.join(f'{t:>9.3f}s' for t in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import json
+import subprocess
+import sys
+
+from typing import Dict, List
+
+statements = {"import acctext": 'import acctext',
+              "AcceleratedText": 'from acctext import AcceleratedText',
+              "AcceleratedText()": 'from acctext import AcceleratedText; AcceleratedText()',
+              "requests": 'import requests'}
+deferred = ['edn_format', 'zipfile', 'csv', 'sqlite3', 'aiohttp']
+
+
+def measure(statement: str, repeat: int) -> Dict:
+    code = ('import sys, time; t = time.perf_counter(); ' + statement + '; elapsed = time.perf_counter() - t; '
+            f'import json; print(json.dumps([elapsed, [m for m in {deferred!r} if m in sys.modules]]))')
+    timings, loaded = [], []
+    for _ in range(repeat):
+        elapsed, loaded = json.loads(subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                                                    text=True).stdout)
+        timings.append(elapsed)
+    return {"statement": statement, "best": min(timings), "loaded": loaded}
+
+
+def run(repeat: int) -> List[Dict]:
+    results = [dict(measure(statement, repeat), name=name) for name, statement in statements.items()]
+    baseline = set(results[-1]['loaded'])
+    for result in results:
+        result['loaded'] = [module for module in result['loaded'] if module not in baseline]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure acctext import time in fresh interpreters')
+    parser.add_argument('--repeat', type=int, default=10, help='interpreters started per statement')
+    parser.add_argument('--json', action='store_true', help='print results as JSON lines')
+    args = parser.parse_args()
+    results = run(args.repeat)
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print(f'{"statement":<20} {"best ms":>8}  eagerly loaded')
+        for r in results:
+            print(f'{r["name"]:<20} {r["best"] * 1000:>8.1f}  {", ".join(r["loaded"]) or "-"}')
+    if any(r['loaded'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Set, Tuple
+
+
+def project(x: Any, fields: Set[str]) -> Any:
+    if isinstance(x, dict):
+        return {k: project(v, fields) for k, v in x.items() if k in fields}
+    elif isinstance(x, list):
+        return [project(v, fields) for v in x]
+    return x
+
+
+class State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.languages = {"Eng": {"id": "Eng", "name": "English", "flag": "🇬🇧", "defaultUsage": "YES"}}
+        self.readers = {}
+        self.dictionary = {}
+        self.document_plans = {}
+        self.data_files = {}
+        self.results = {}
+        self.requests = 0
+
+    def data_file(self, id: str, record_offset: int = 0, record_limit: int = None) -> Dict:
+        data_file = self.data_files[id]
+        record_limit = len(data_file['rows']) if record_limit is None else record_limit
+        rows = data_file['rows'][record_offset:record_offset + record_limit]
+        return {"id": id,
+                "fileName": data_file['filename'],
+                "fieldNames": data_file['header'],
+                "records": [{"id": f'{id}-{i}',
+                             "fields": [{"id": f'{id}-{i}-{j}', "fieldName": name, "value": value}
+                                        for j, (name, value) in enumerate(zip(data_file['header'], row))]}
+                            for i, row in enumerate(rows, record_offset)],
+                "recordOffset": record_offset,
+                "recordLimit": record_limit,
+                "recordCount": len(data_file['rows'])}
+
+    def add_data_file(self, id: str, filename: str, content: str):
+        rows = list(csv.reader(io.StringIO(content)))
+        self.data_files[id] = {"filename": filename, "header": rows[0], "rows": rows[1:]}
+
+    def resolve(self, field: str, args: Dict) -> Any:
+        if field == 'createDictionaryItem':
+            item = {"id": args['id'], "name": args['name'], "partOfSpeech": args['partOfSpeech'],
+                    "language": args['language'], "phrases": [{"text": form} for form in args['forms']],
+                    "attributes": args['attributes']}
+            self.dictionary[item['id']] = item
+            return item
+        elif field == 'dictionaryItem':
+            return self.dictionary.get(args['dictionaryItemId'])
+        elif field == 'deleteDictionaryItem':
+            return self.dictionary.pop(args['id'], None) is not None
+        elif field == 'dictionary':
+            return {"items": list(self.dictionary.values())}
+        elif field == 'createDocumentPlan':
+            previous = self.document_plans.get(args['id'], {})
+            self.document_plans[args['id']] = dict(args, createdAt=previous.get('createdAt', int(time.time())),
+                                                   updatedAt=int(time.time()),
+                                                   updateCount=previous.get('updateCount', -1) + 1)
+            return self.document_plans[args['id']]
+        elif field == 'updateDocumentPlan':
+            document_plan = self.document_plans[args['id']]
+            document_plan.update({k: v for k, v in args.items() if v is not None}, updatedAt=int(time.time()),
+                                 updateCount=document_plan['updateCount'] + 1)
+            return document_plan
+        elif field == 'documentPlan':
+            return next((dp for dp in self.document_plans.values()
+                         if dp['id'] == args.get('id') or dp['name'] == args.get('name')), None)
+        elif field == 'documentPlans':
+            items = [dp for dp in self.document_plans.values() if not args.get('kind') or dp['kind'] == args['kind']]
+            return {"items": items[args['offset']:args['offset'] + args['limit']],
+                    "offset": args['offset'], "limit": args['limit'], "totalCount": len(items)}
+        elif field == 'deleteDocumentPlan':
+            return self.document_plans.pop(args['id'], None) is not None
+        elif field == 'getDataFile':
+            if args['id'] not in self.data_files:
+                return None
+            return self.data_file(args['id'], args.get('recordOffset') or 0, args.get('recordLimit'))
+        elif field == 'listDataFiles':
+            offset, limit = args.get('offset') or 0, args.get('limit') or 1000
+            ids = list(self.data_files)[offset:offset + limit]
+            return {"offset": offset, "limit": limit, "totalCount": len(self.data_files),
+                    "dataFiles": [self.data_file(id, args.get('recordOffset') or 0, args.get('recordLimit', 0))
+                                  for id in ids]}
+        elif field == 'createDataFile':
+            self.add_data_file(args['id'], args['filename'], args['content'])
+            return {"id": args['id']}
+        elif field in {'languages', 'readerFlags'}:
+            return {"flags": list((self.languages if field == 'languages' else self.readers).values())}
+        elif field in {'language', 'readerFlag'}:
+            return (self.languages if field == 'language' else self.readers).get(args['id'])
+        elif field in {'addLanguage', 'createReaderFlag'}:
+            flags = self.languages if field == 'addLanguage' else self.readers
+            flags[args['id']] = {"id": args['id'], "name": args['name'], "flag": args.get('flag'),
+                                 "defaultUsage": args['defaultUsage']}
+            return flags[args['id']]
+        elif field in {'deleteLanguage', 'deleteReaderFlag'}:
+            return (self.languages if field == 'deleteLanguage' else self.readers).pop(args['id'], None) is not None
+        raise ValueError(f'Unknown field {field}')
+
+    def graphql(self, body: Dict) -> Dict:
+        query, variables = body['query'], body.get('variables') or {}
+        operation = query.split('\nfragment ')[0]
+        selection = operation[operation.index('{') + 1:]
+        aliases = re.findall(r'(a\d+): (\w+)', selection)
+        fields = [(alias, field, {k[len(alias) + 1:]: v for k, v in variables.items() if k.startswith(f'{alias}_')})
+                  for alias, field in aliases] or [(name, name, variables)
+                                                  for name in re.findall(r'^\s*(\w+)', selection)[:1]]
+        data, errors = {}, []
+        with self.lock:
+            for alias, field, args in fields:
+                try:
+                    data[alias] = self.resolve(field, args)
+                except Exception as e:
+                    data[alias] = None
+                    errors.append({"message": repr(e), "path": [alias]})
+        return dict({"data": project(data, set(re.findall(r'\w+', query)))}, **({"errors": errors} if errors else {}))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: 'FakeServer'
+
+    def log_message(self, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                if size == 0:
+                    return b''.join(chunks)
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def respond(self, body: Any, status: int = 200):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def route(self, method: str) -> Tuple[Any, int]:
+        fake, state = self.server, self.server.state
+        path = self.path.split('?')[0]
+        body = self.read_body()
+        with state.lock:
+            state.requests += 1
+        if fake.latency:
+            time.sleep(fake.latency)
+        if (method, path) == ('GET', '/health'):
+            return {"health": "Ok"}, 200
+        elif (method, path) == ('GET', '/status'):
+            return {"color": "green", "services": {}}, 200
+        elif (method, path) == ('POST', '/_graphql'):
+            return state.graphql(json.loads(body)), 200
+        elif (method, path) == ('POST', '/nlg/'):
+            request = json.loads(body)
+            time.sleep(fake.realisation_time)
+            return dict({"resultId": str(uuid.uuid4()), "offset": 0, "totalCount": 1, "ready": True},
+                        **fake.realise(request['documentPlanName'], request['dataRow'])), 200
+        elif (method, path) == ('POST', '/nlg/_bulk/'):
+            request = json.loads(body)
+            now = time.time()
+            with state.lock:
+                for id, row in request['dataRows'].items():
+                    state.results[id] = dict(fake.realise(request['documentPlanName'], row),
+                                             readyAt=now + random.uniform(0, fake.realisation_time))
+            return {"resultIds": list(request['dataRows'])}, 200
+        elif path.startswith('/nlg/') and method == 'GET':
+            result = state.results.get(path[len('/nlg/'):])
+            if result is None:
+                return {"error": True, "message": "Result not found"}, 404
+            ready = time.time() >= result['readyAt']
+            return dict({"resultId": path[len('/nlg/'):], "offset": 0, "totalCount": 1, "ready": ready,
+                         "updatedAt": int(result['readyAt'])},
+                        **({"variants": result['variants']} if ready else {})), 200
+        elif path.startswith('/nlg/') and method == 'DELETE':
+            with state.lock:
+                state.results.pop(path[len('/nlg/'):], None)
+            return {"message": "Succesfully deleted result"}, 200
+        elif (method, path) == ('POST', '/accelerated-text-data-files/'):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f'Content-Type: {self.headers["Content-Type"]}\r\n\r\n'.encode('utf-8') + body)
+            part = next(part for part in message.iter_parts()
+                        if part.get_param('name', header='content-disposition') == 'file')
+            with state.lock:
+                state.add_data_file(part.get_filename(), part.get_filename(),
+                                    part.get_payload(decode=True).decode('utf-8'))
+            return {"message": "Succesfully uploaded file", "id": part.get_filename()}, 200
+        elif (method, path) == ('DELETE', '/accelerated-text-data-files/'):
+            id = json.loads(body)['id']
+            with state.lock:
+                state.data_files.pop(id, None)
+            return {"message": "Succesfully deleted file", "id": id}, 200
+        return {"message": "Not found"}, 404
+
+    def handle_method(self, method: str):
+        self.respond(*self.route(method))
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, realisation_time: float = 0.0, variants: int = 1,
+                 variant_size: int = 64):
+        super().__init__(('127.0.0.1', port), Handler)
+        self.latency = latency
+        self.realisation_time = realisation_time
+        self.variants = variants
+        self.variant_size = variant_size
+        self.state = State()
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+    def realise(self, document_plan_name: str, row: Dict) -> Dict:
+        text = f'{document_plan_name}: ' + ', '.join(f'{k}={v}' for k, v in sorted(row.items()))
+        return {"variants": [text.ljust(self.variant_size, '.') for _ in range(self.variants)]}
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
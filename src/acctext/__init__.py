@@ -1 +1,11 @@
-from acctext.core import AcceleratedText
+__all__ = ['AcceleratedText', 'AsyncAcceleratedText']
+
+
+def __getattr__(name: str):
+    if name == 'AcceleratedText':
+        from acctext.core import AcceleratedText
+        return AcceleratedText
+    elif name == 'AsyncAcceleratedText':
+        from acctext.aio import AsyncAcceleratedText
+        return AsyncAcceleratedText
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
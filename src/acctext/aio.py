@@ -0,0 +1,433 @@
+import aiohttp
+import asyncio
+import json
+import os
+import random
+import uuid
+
+from urllib.parse import urljoin
+from typing import Dict, Iterable, List, Any, Callable, AsyncIterator, Awaitable
+from collections import OrderedDict
+
+from acctext import graphql, serialization, transforms
+
+
+class AsyncAcceleratedText:
+    default_reader_model = ["Eng"]
+
+    def __init__(self, host: str = 'http://127.0.0.1:3001', pool_size: int = 100, concurrency: int = 1000,
+                 timeout: float = None, retries: int = 3, backoff_factor: float = 0.1,
+                 poll_interval: float = 0.01, max_poll_interval: float = 1.0):
+        self.host = host
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.concurrency = concurrency
+        self.semaphore = None
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            self.semaphore = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> aiohttp.ClientResponse:
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size),
+                                                 timeout=self.timeout)
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.backoff_factor * 2 ** (attempt - 1))
+                try:
+                    async with self.session.request(method, urljoin(self.host, path), **kwargs) as r:
+                        await r.read()
+                except aiohttp.ClientConnectionError:
+                    if attempt == self.retries:
+                        raise
+                    continue
+                if r.status not in {502, 503, 504}:
+                    break
+            return r
+
+    async def _response(self, r: aiohttp.ClientResponse):
+        if r.status in {200, 500}:
+            return await r.json(content_type=None, loads=serialization.loads)
+        else:
+            return r
+
+    async def _graphql(self, body: dict, transform: Callable = None):
+        r = await self._request('POST', '_graphql',
+                                headers={"Content-Type": "application/json"},
+                                data=serialization.dumps(body))
+        r = await self._response(r)
+        if type(r) == aiohttp.ClientResponse:
+            return r
+        elif 'errors' in r:
+            raise Exception(r['errors'])
+        else:
+            keys = list(r['data'].keys())
+            data = r['data'][keys[0]] if len(keys) == 1 else r['data']
+            return transform(data) if transform else data
+
+    async def health(self) -> Dict:
+        r = await self._request('GET', 'health')
+        return await self._response(r)
+
+    async def status(self) -> Dict:
+        r = await self._request('GET', 'status')
+        return await self._response(r)
+
+    async def upload_data_file(self, path: str) -> Dict:
+        filename = os.path.split(path)[-1]
+        with open(path, 'rb') as file:
+            data = aiohttp.FormData()
+            data.add_field('file', file, filename=filename)
+            r = await self._request('POST', 'accelerated-text-data-files/', data=data)
+        return await self._response(r)
+
+    async def create_data_file(self, filename: str, header: Iterable[str], rows: Iterable[Iterable[Any]],
+                               id: str = None) -> Dict:
+        body = {"operationName": "createDataFile",
+                "query": graphql.create_data_file,
+                "variables": {"id": id or filename,
+                              "filename": filename,
+                              "content": transforms.data_file_to_csv({"header": header, "rows": rows})}}
+        return await self._graphql(body)
+
+    async def get_data_file(self, id: str, record_offset: int = 0, record_limit: int = 1000000000,
+                            columnar: bool = False) -> Dict:
+        body = {"operationName": "getDataFile",
+                "query": graphql.get_data_file,
+                "variables": {"id": id,
+                              "recordOffset": record_offset,
+                              "recordLimit": record_limit}}
+        return await self._graphql(body, transform=transforms.data_file_columns if columnar else transforms.data_file)
+
+    async def list_data_files(self, offset: int = 0, limit: int = 1000, record_offset=0,
+                              record_limit: int = 1000000000, fields: str = 'full') -> Iterable[Dict]:
+        if fields not in ('ids', 'metadata', 'full'):
+            raise ValueError(f'Unknown fields {fields}')
+        if fields != 'full':
+            body = {"operationName": "listDataFiles",
+                    "query": {"ids": graphql.list_data_files_ids,
+                              "metadata": graphql.list_data_files_metadata}[fields],
+                    "variables": {"offset": offset,
+                                  "limit": limit}}
+            transform = transforms.data_file_metadata if fields == 'metadata' else dict
+            return await self._graphql(body, transform=lambda x: [transform(f) for f in x['dataFiles']])
+        body = {"operationName": "listDataFiles",
+                "query": graphql.list_data_files,
+                "variables": {"offset": offset,
+                              "limit": limit,
+                              "recordOffset": record_offset,
+                              "recordLimit": record_limit}}
+        return await self._graphql(body, transform=lambda x: [transforms.data_file(f) for f in x['dataFiles']])
+
+    async def _data_file_page(self, id: str, offset: int, limit: int) -> Dict:
+        body = {"operationName": "getDataFile",
+                "query": graphql.get_data_file,
+                "variables": {"id": id,
+                              "recordOffset": offset,
+                              "recordLimit": limit}}
+        page = await self._graphql(body, transform=lambda x: x and transforms.data_file_page(x))
+        if page is None:
+            raise Exception(f'Data file {id} not found')
+        elif type(page) == aiohttp.ClientResponse:
+            raise Exception(page)
+        return page
+
+    async def _data_files_page(self, offset: int, limit: int) -> Dict:
+        body = {"operationName": "listDataFiles",
+                "query": graphql.list_data_files_metadata,
+                "variables": {"offset": offset,
+                              "limit": limit}}
+        page = await self._graphql(body, transform=transforms.data_files_page)
+        if type(page) == aiohttp.ClientResponse:
+            raise Exception(page)
+        return page
+
+    async def _iter_pages(self, fetch: Callable[[int], Awaitable[Dict]], items: str, total: str,
+                          prefetch: bool) -> AsyncIterator:
+        following = None
+        try:
+            offset = 0
+            page = await fetch(offset)
+            while True:
+                offset += len(page[items])
+                more = len(page[items]) > 0 and offset < page[total]
+                following = asyncio.ensure_future(fetch(offset)) if more and prefetch else None
+                for item in page[items]:
+                    yield item
+                if not more:
+                    return
+                page = await (fetch(offset) if following is None else following)
+        finally:
+            if following is not None:
+                following.cancel()
+
+    async def iter_data_file_rows(self, id: str, page_size: int = 1000,
+                                  prefetch: bool = False) -> AsyncIterator[List[Any]]:
+        async for row in self._iter_pages(lambda offset: self._data_file_page(id, offset, page_size),
+                                          'rows', 'record_count', prefetch):
+            yield row
+
+    async def iter_data_files(self, page_size: int = 100, record_page_size: int = 1000,
+                              prefetch: bool = False) -> AsyncIterator[Dict]:
+        async for data_file in self._iter_pages(lambda offset: self._data_files_page(offset, page_size),
+                                                'data_files', 'total_count', prefetch):
+            data_file['rows'] = self.iter_data_file_rows(data_file['id'], page_size=record_page_size,
+                                                         prefetch=prefetch)
+            yield data_file
+
+    async def delete_data_file(self, id: str) -> Dict:
+        body = {"id": id}
+        r = await self._request('DELETE', 'accelerated-text-data-files/',
+                                headers={"Content-Type": "application/json"},
+                                data=serialization.dumps(body))
+        return await self._response(r)
+
+    async def generate(self, document_plan_name: str, data: Dict[str, Any],
+                       reader_model: Iterable[str] = None) -> Dict:
+        body = {"documentPlanName": document_plan_name,
+                "dataRow": data,
+                "readerFlagValues": {reader: True for reader in reader_model or self.default_reader_model},
+                "async": False}
+        r = await self._request('POST', 'nlg/',
+                                headers={"Content-Type": "application/json"},
+                                data=serialization.dumps(body))
+        return await self._response(r)
+
+    async def generate_bulk(self, document_plan_name: str, data: Iterable[Dict[str, Any]],
+                            reader_model: Iterable[str] = None) -> List[Dict]:
+        body = {"documentPlanName": document_plan_name,
+                "dataRows": OrderedDict([(str(uuid.uuid4()), row) for row in data]),
+                "readerFlagValues": {reader: True for reader in reader_model or self.default_reader_model}}
+        r = await self._request('POST', 'nlg/_bulk/',
+                                headers={"Content-Type": "application/json"},
+                                data=serialization.dumps(body))
+        results = await self._response(r)
+        if type(results) == aiohttp.ClientResponse:
+            return results
+        return await asyncio.gather(*(self.get_result(result_id) for result_id in body['dataRows'].keys()))
+
+    async def get_result(self, id: str, format: str = 'raw') -> Dict:
+        delay = self.poll_interval
+        while True:
+            r = await self._request('GET', f'nlg/{id}', params={"format": format})
+            result = await self._response(r)
+            if type(result) == aiohttp.ClientResponse or result.get('error') or result['ready']:
+                return result
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval) * random.uniform(0.5, 1)
+
+    async def delete_result(self, id: str) -> Dict:
+        r = await self._request('DELETE', f'nlg/{id}')
+        return await self._response(r)
+
+    async def create_dictionary_item(self, key: str, category: str, forms: List[str], id: str = None,
+                                     language: str = "Eng", attributes: Dict[str, Any] = None) -> Dict:
+        if not attributes:
+            attributes = {}
+        body = {"operationName": "createDictionaryItem",
+                "query": graphql.create_dictionary_item,
+                "variables": {"id": id or "_".join([key, category, language]),
+                              "name": key,
+                              "key": key,
+                              "partOfSpeech": category,
+                              "forms": forms,
+                              "language": language,
+                              "attributes": [{"name": k, "value": v} for k, v in attributes.items()]}}
+        return await self._graphql(body, transform=transforms.dictionary_item)
+
+    async def get_dictionary_item(self, id: str) -> Dict:
+        body = {"operationName": "getDictionaryItem",
+                "query": graphql.get_dictionary_item,
+                "variables": {"dictionaryItemId": id}}
+        return await self._graphql(body, transform=transforms.dictionary_item)
+
+    async def delete_dictionary_item(self, id: str) -> bool:
+        body = {"operationName": "deleteDictionaryItem",
+                "query": graphql.delete_dictionary_item,
+                "variables": {"id": id}}
+        return await self._graphql(body)
+
+    async def list_dictionary_items(self, fields: str = 'full') -> Iterable[Dict]:
+        if fields not in ('ids', 'metadata', 'full'):
+            raise ValueError(f'Unknown fields {fields}')
+        body = {"operationName": "dictionary",
+                "query": {"ids": graphql.dictionary_ids,
+                          "metadata": graphql.dictionary_metadata,
+                          "full": graphql.dictionary}[fields]}
+        transform = {"ids": dict,
+                     "metadata": transforms.dictionary_item_metadata,
+                     "full": transforms.dictionary_item}[fields]
+        return await self._graphql(body, transform=lambda x: [transform(item) for item in x['items']])
+
+    async def get_document_plan(self, id: str = None, name: str = None) -> Dict:
+        body = {"operationName": "documentPlan",
+                "query": graphql.document_plan,
+                "variables": {"id": id,
+                              "name": name}}
+        return await self._graphql(body, transform=transforms.document_plan)
+
+    async def list_document_plans(self, kind: str = None, offset: int = 0, limit: int = 10000,
+                                  fields: str = 'full') -> Iterable[Dict]:
+        if fields not in ('ids', 'metadata', 'full'):
+            raise ValueError(f'Unknown fields {fields}')
+        body = {"operationName": "documentPlans",
+                "query": {"ids": graphql.document_plans_ids,
+                          "metadata": graphql.document_plans_metadata,
+                          "full": graphql.document_plans}[fields],
+                "variables": {"offset": offset,
+                              "limit": limit,
+                              "kind": kind}}
+        return await self._graphql(body, transform=lambda x: [transforms.document_plan(dp) for dp in x['items']])
+
+    async def create_document_plan(self, id: str, uid: str, name: str, kind: str, examples: List[str],
+                                   blocklyXml: str, documentPlan: Dict) -> Dict:
+        body = {"operationName": "createDocumentPlan",
+                "query": graphql.create_document_plan,
+                "variables": {"id": id,
+                              "uid": uid,
+                              "name": name,
+                              "kind": kind,
+                              "examples": examples,
+                              "blocklyXml": blocklyXml,
+                              "documentPlan": serialization.dumps_text(documentPlan)}}
+        return await self._graphql(body, transform=transforms.document_plan)
+
+    async def delete_document_plan(self, id: str) -> bool:
+        body = {"operationName": "deleteDocumentPlan",
+                "query": graphql.delete_document_plan,
+                "variables": {"id": id}}
+        return await self._graphql(body)
+
+    async def get_language(self, id: str) -> Dict:
+        body = {"operationName": "language",
+                "query": graphql.language,
+                "variables": {"id": id}}
+        return await self._graphql(body, transform=transforms.reader_flag)
+
+    async def add_language(self, id: str, name: str, flag: str = None, default: bool = False) -> Dict:
+        body = {"operationName": "addLanguage",
+                "query": graphql.add_language,
+                "variables": {"id": id,
+                              "name": name,
+                              "flag": flag,
+                              "defaultUsage": "YES" if default else "NO"}}
+        return await self._graphql(body, transform=transforms.reader_flag)
+
+    async def delete_language(self, id: str) -> bool:
+        body = {"operationName": "deleteLanguage",
+                "query": graphql.delete_language,
+                "variables": {"id": id}}
+        return await self._graphql(body)
+
+    async def list_languages(self) -> Iterable[Dict]:
+        body = {"operationName": "languages",
+                "query": graphql.languages}
+        return await self._graphql(body, transform=lambda x: [transforms.reader_flag(flag)
+                                                              for flag in x.get('flags', [])])
+
+    async def get_reader(self, id: str) -> Dict:
+        body = {"operationName": "readerFlag",
+                "query": graphql.reader_flag,
+                "variables": {"id": id}}
+        return await self._graphql(body, transform=transforms.reader_flag)
+
+    async def create_reader(self, id: str, name: str, flag: str, default: bool = False) -> Dict:
+        body = {"operationName": "createReaderFlag",
+                "query": graphql.create_reader_flag,
+                "variables": {"id": id,
+                              "name": name,
+                              "flag": flag,
+                              "defaultUsage": "YES" if default else "NO"}}
+        return await self._graphql(body, transform=transforms.reader_flag)
+
+    async def delete_reader(self, id: str) -> bool:
+        body = {"operationName": "deleteReaderFlag",
+                "query": graphql.delete_reader_flag,
+                "variables": {"id": id}}
+        return await self._graphql(body)
+
+    async def list_readers(self) -> Iterable[Dict]:
+        body = {"operationName": "readerFlags",
+                "query": graphql.reader_flags}
+        return await self._graphql(body, transform=lambda x: [transforms.reader_flag(flag)
+                                                              for flag in x.get('flags', [])])
+
+    async def clear_state(self):
+        for lang in await self.list_languages():
+            if lang['id'] in self.default_reader_model:
+                await self.add_language(lang['id'], lang['name'], lang['flag'], True)
+            else:
+                await self.delete_language(lang['id'])
+        for reader in await self.list_readers():
+            if reader['id'] in self.default_reader_model:
+                await self.create_reader(reader['id'], reader['name'], reader['flag'], True)
+            else:
+                await self.delete_reader(reader['id'])
+        await asyncio.gather(*(self.delete_dictionary_item(dict_item['id'])
+                               for dict_item in await self.list_dictionary_items(fields='ids')))
+        await asyncio.gather(*(self.delete_data_file(data_file['id'])
+                               for data_file in await self.list_data_files(fields='ids')))
+        await asyncio.gather(*(self.delete_document_plan(document_plan['id'])
+                               for document_plan in await self.list_document_plans(fields='ids')))
+
+    async def export_state(self, output_path: str, overwrite: bool = True):
+        import edn_format
+        from zipfile import ZipFile
+
+        languages, readers, document_plans, dictionary, data_files = await asyncio.gather(
+            self.list_languages(), self.list_readers(), self.list_document_plans(),
+            self.list_dictionary_items(), self.list_data_files())
+        if overwrite and os.path.exists(output_path):
+            os.remove(output_path)
+        with ZipFile(output_path, 'a') as file:
+            languages = [transforms.reader_flag_to_edn(language) for language in languages]
+            file.writestr('config/languages.edn', edn_format.dumps(languages, indent=4))
+            readers = [transforms.reader_flag_to_edn(reader) for reader in readers]
+            file.writestr('config/readers.edn', edn_format.dumps(readers, indent=4))
+            for document_plan in document_plans:
+                file.writestr(f'document-plans/{document_plan["id"]}.json', json.dumps(document_plan, indent=4))
+            file.writestr('dictionary/dictionary.edn', edn_format.dumps(dictionary, indent=4))
+            for data_file in data_files:
+                file.writestr(f'data-files/{data_file["filename"]}', transforms.data_file_to_csv(data_file))
+
+    async def restore_state(self, path: str):
+        import edn_format
+        from zipfile import ZipFile
+
+        with ZipFile(path, 'r') as file:
+            file_list = list(map(lambda x: x.filename, file.filelist))
+            with file.open('config/languages.edn') as languages:
+                for language in edn_format.loads(languages.read()):
+                    await self.add_language(**transforms.reader_flag_from_edn(language))
+            with file.open('config/readers.edn') as readers:
+                for reader in edn_format.loads(readers.read()):
+                    await self.create_reader(**transforms.reader_flag_from_edn(reader))
+            tasks = []
+            for document_plan in filter(lambda x: x.startswith('document-plans'), file_list):
+                with file.open(document_plan) as dp:
+                    tasks.append(self.create_document_plan(**json.load(dp)))
+            for dictionary in filter(lambda x: x.startswith('dictionary'), file_list):
+                with file.open(dictionary) as d:
+                    for dict_item in edn_format.loads(d.read()):
+                        tasks.append(self.create_dictionary_item(**transforms.dictionary_item_from_edn(dict_item)))
+            for data_file in filter(lambda x: x.startswith('data-files'), file_list):
+                with file.open(data_file) as df:
+                    filename = os.path.split(data_file)[-1]
+                    tasks.append(self.create_data_file(**transforms.data_file_from_csv(filename, df.read())))
+            await asyncio.gather(*tasks)
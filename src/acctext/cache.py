@@ -0,0 +1,168 @@
+import hashlib
+import json
+import threading
+import time
+
+from typing import Dict, Iterable, Any, Optional, Callable, Hashable
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def key(document_plan_name: str, data: Dict[str, Any], reader_model: Iterable[str]) -> str:
+    return hashlib.sha256(json.dumps([document_plan_name, data, sorted(reader_model)],
+                                     sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_size: int = 10000, ttl: float = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None and (item[0] is None or item[0] > time.time()):
+                self.items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            elif item is not None:
+                del self.items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict):
+        with self.lock:
+            self.items[key] = (None if self.ttl is None else time.time() + self.ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.items)}
+
+
+class SQLiteResultCache(ResultCache):
+    def __init__(self, path: str, max_size: int = 1000000, ttl: float = None, eviction_interval: int = 1000):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.eviction_interval = eviction_interval
+        self.writes = 0
+        import sqlite3
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results '
+                                '(key TEXT PRIMARY KEY, value TEXT, expires REAL, accessed REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute('SELECT value, expires FROM results WHERE key = ?', (key,)).fetchone()
+            if row is not None and (row[1] is None or row[1] > now):
+                self.connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+                self.hits += 1
+                return json.loads(row[0])
+            elif row is not None:
+                self.connection.execute('DELETE FROM results WHERE key = ?', (key,))
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict):
+        now = time.time()
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                                    (key, json.dumps(value), None if self.ttl is None else now + self.ttl, now))
+            self.writes += 1
+            if self.writes % self.eviction_interval == 0:
+                self.connection.execute('DELETE FROM results WHERE key IN (SELECT key FROM results '
+                                        'ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_size,))
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM results')
+
+    def stats(self) -> Dict:
+        with self.lock:
+            size = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "size": size}
+
+    def close(self):
+        self.connection.close()
+
+
+class LookupCache:
+    def __init__(self, ttl: float = None, revalidate_interval: float = 1.0):
+        self.ttl = ttl
+        self.revalidate_interval = revalidate_interval
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.items = {}
+        self.flights = {}
+
+    def get(self, key: Hashable, load: Callable[[], Any], valid: Callable[[Any], bool] = None,
+            ttl: float = None) -> Any:
+        ttl = self.ttl if ttl is None else ttl
+        with self.lock:
+            item = self.items.get(key)
+        if item is not None and (ttl is None or item[0] + ttl > time.monotonic()) and self._valid(valid, item[1]):
+            with self.lock:
+                self.hits += 1
+            return item[1]
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Future()
+                generation = self.generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        return self._load(key, load, flight, generation) if leader else flight.result()
+
+    def _valid(self, valid: Callable[[Any], bool], value: Any) -> bool:
+        if valid is None:
+            return True
+        try:
+            return valid(value)
+        except Exception:
+            return True
+
+    def _load(self, key: Hashable, load: Callable[[], Any], flight: Future, generation: int) -> Any:
+        try:
+            value = load()
+        except BaseException as e:
+            with self.lock:
+                del self.flights[key]
+            flight.set_exception(e)
+            raise
+        with self.lock:
+            del self.flights[key]
+            if isinstance(value, (dict, list)) and generation == self.generation:
+                self.items[key] = (time.monotonic(), value)
+        flight.set_result(value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.items.clear()
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "size": len(self.items)}
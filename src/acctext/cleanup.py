@@ -0,0 +1,63 @@
+import queue
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
+
+
+class ResultReleaser:
+    def __init__(self, delete: Callable[[str], bool], batch_size: int = 100, interval: float = 0.5,
+                 max_workers: int = 2):
+        self.delete = delete
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.released = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self.run, name='acctext-release', daemon=True)
+        self.thread.start()
+
+    def release(self, ids: Iterable[str]):
+        for id in ids:
+            self.queue.put(id)
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while None not in batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            results = list(self.executor.map(self.attempt, [id for id in batch if id is not None]))
+            with self.lock:
+                self.released += sum(results)
+                self.failed += len(results) - sum(results)
+            for _ in batch:
+                self.queue.task_done()
+            if None in batch:
+                return
+
+    def attempt(self, id: str) -> bool:
+        try:
+            return bool(self.delete(id))
+        except Exception:
+            return False
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.executor.shutdown()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"pending": self.queue.qsize(),
+                    "released": self.released,
+                    "failed": self.failed}
@@ -0,0 +1,164 @@
+import argparse
+import json
+import sys
+import time
+import requests
+
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, List, Any, Set, Tuple, TextIO
+
+from acctext.core import AcceleratedText
+
+client = None
+
+
+def read_rows(f: TextIO, input_format: str) -> Iterable[Dict[str, Any]]:
+    if input_format == 'csv':
+        import csv
+        yield from csv.DictReader(f)
+    else:
+        yield from (json.loads(line) for line in f if line.strip())
+
+
+def read_checkpoint(path: str) -> Set[int]:
+    done = set()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if 'error' not in r:
+                    done.add(r['index'])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def record(index: int, row: Dict[str, Any], result: Any) -> Dict:
+    if type(result) == requests.Response:
+        return {"index": index, "data": row, "error": {"status": result.status_code, "message": result.text}}
+    elif result.get('error'):
+        return {"index": index, "data": row, "error": {"message": result.get('message')}}
+    return {"index": index, "data": row, "variants": result.get('variants', [])}
+
+
+def generate_stream(at: AcceleratedText, args, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> Iterable[Dict]:
+    positions = {}
+
+    def data():
+        for index, row in rows:
+            positions[id(row)] = index
+            yield row
+
+    for row, result in at.generate_bulk_stream(args.document_plan, data(), reader_model=args.reader_model,
+                                               batch_size=args.batch_size, max_in_flight=args.max_in_flight,
+                                               ordered=not args.unordered, timeout=args.timeout,
+                                               max_workers=args.max_workers):
+        yield record(positions.pop(id(row)), row, result)
+
+
+def init_worker(host: str, pool_size: int, timeout: float):
+    global client
+    client = AcceleratedText(host, pool_size=pool_size, timeout=timeout)
+
+
+def generate_batch(args, batch: List[Tuple[int, Dict[str, Any]]]) -> List[Dict]:
+    results = client.generate_bulk(args.document_plan, [row for _, row in batch], reader_model=args.reader_model,
+                                   ordered=True, timeout=args.timeout, max_workers=args.max_workers)
+    if type(results) == requests.Response:
+        return [record(index, row, results) for index, row in batch]
+    return [record(index, row, result) for (index, row), result in zip(batch, results)]
+
+
+def generate_parallel(args, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> Iterable[Dict]:
+    from multiprocessing import Pool
+
+    rows = iter(rows)
+    pending = deque()
+    with Pool(args.processes, initializer=init_worker,
+              initargs=(args.host, args.max_workers, args.request_timeout)) as pool:
+        while True:
+            while len(pending) < args.processes * args.max_in_flight:
+                batch = list(islice(rows, args.batch_size))
+                if not batch:
+                    break
+                pending.append(pool.apply_async(generate_batch, (args, batch)))
+            if not pending:
+                return
+            yield from pending.popleft().get()
+
+
+def generate(args) -> int:
+    done = read_checkpoint(args.output) if args.resume and args.output != '-' else set()
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8', newline='')
+    input_format = args.input_format or ('csv' if args.input.endswith('.csv') else 'jsonl')
+    if args.output == '-':
+        output = sys.stdout
+    else:
+        output = open(args.output, 'a' if args.resume else 'w', encoding='utf-8')
+        if args.resume and output.tell() > 0:
+            with open(args.output, 'rb') as f:
+                f.seek(-1, 2)
+                if f.read(1) != b'\n':
+                    output.write('\n')
+    rows = ((index, row) for index, row in enumerate(read_rows(source, input_format)) if index not in done)
+    written = failed = 0
+    start = time.perf_counter()
+    try:
+        if args.processes > 1:
+            records = generate_parallel(args, rows)
+        else:
+            at = AcceleratedText(args.host, pool_size=args.max_workers, timeout=args.request_timeout)
+            records = generate_stream(at, args, rows)
+        for r in records:
+            output.write(json.dumps(r) + '\n')
+            written += 1
+            failed += 'error' in r
+            if written % args.batch_size == 0:
+                output.flush()
+    finally:
+        output.flush()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print(f'{written} rows in {elapsed:.1f}s ({written / elapsed if elapsed else 0:.1f} rows/s), '
+          f'{failed} failed, {len(done)} skipped', file=sys.stderr)
+    return 1 if failed else 0
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='acctext', description='Accelerated Text command line client')
+    commands = parser.add_subparsers(dest='command', required=True)
+    g = commands.add_parser('generate', help='generate text for every row of a CSV or JSONL file',
+                            description='Stream rows to Accelerated Text and write results as JSON lines')
+    g.add_argument('document_plan', help='document plan name')
+    g.add_argument('input', nargs='?', default='-', help='CSV or JSONL file (default: stdin)')
+    g.add_argument('-o', '--output', default='-', help='JSONL output file (default: stdout)')
+    g.add_argument('--host', default='http://127.0.0.1:3001')
+    g.add_argument('--input-format', choices=['csv', 'jsonl'], help='default: by file extension, else jsonl')
+    g.add_argument('--reader-model', nargs='*', help='reader flags enabled for generation')
+    g.add_argument('--batch-size', type=int, default=1000, help='rows per bulk job')
+    g.add_argument('--max-in-flight', type=int, default=4, help='bulk jobs in flight per process')
+    g.add_argument('--max-workers', type=int, default=10, help='concurrent result polls per process')
+    g.add_argument('--processes', type=int, default=1, help='worker processes')
+    g.add_argument('--unordered', action='store_true', help='write results as they complete')
+    g.add_argument('--timeout', type=float, help='seconds to wait for the results of one bulk job')
+    g.add_argument('--request-timeout', type=float, help='seconds to wait for one HTTP request')
+    g.add_argument('--resume', action='store_true',
+                   help='append to the output file, skipping rows it already holds results for')
+    g.set_defaults(func=generate)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
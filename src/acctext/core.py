@@ -1,34 +1,232 @@
 import requests
 import json
+import hashlib
 import os
 import uuid
 import time
-import edn_format
+import heapq
+import random
+import threading
 
+from itertools import count, islice
 from urllib.parse import urljoin
-from typing import Dict, Iterable, List, Any, Callable
-from collections import OrderedDict
-from zipfile import ZipFile
+from typing import Dict, Iterable, List, Any, Callable, Tuple, Union, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from functools import partial
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from acctext import graphql, transforms
+from acctext import cache, graphql, metrics, serialization, transforms
+from acctext.hosts import HostPool
+from acctext.limits import AdaptiveLimiter
+from acctext.cleanup import ResultReleaser
 
 
 class AcceleratedText:
     default_reader_model = ["Eng"]
 
-    def __init__(self, host: str = 'http://127.0.0.1:3001'):
-        self.host = host
+    max_pinned_results = 1000000
+    limited_operations = {'generate', 'generate_bulk', 'get_result'}
+
+    def __init__(self, host: Union[str, Iterable[str]] = 'http://127.0.0.1:3001', pool_size: int = 10,
+                 keep_alive: bool = True, timeout: Union[float, Tuple[float, float]] = None, retries: int = 3,
+                 backoff_factor: float = 0.1, poll_interval: float = 0.01, max_poll_interval: float = 1.0,
+                 cache: cache.ResultCache = None, hooks: Iterable[metrics.Hook] = (),
+                 balancing: str = 'least-outstanding', health_interval: float = 5.0,
+                 limiter: AdaptiveLimiter = None, deadline: float = None, hedge_percentile: float = None,
+                 hedge_min_samples: int = 20, lookups: cache.LookupCache = None, release_results: bool = False):
+        hosts = [host] if isinstance(host, str) else list(host)
+        self.host = hosts[0]
+        self.hosts = HostPool(hosts, balancing) if len(hosts) > 1 else None
+        self.pinned = {}
+        self.pinned_lock = threading.Lock()
+        self.limiter = limiter
+        self.unreleased = {} if release_results else None
+        self.unreleased_lock = threading.Lock()
+        self.polling = set()
+        self.releaser = ResultReleaser(self._release_result) if release_results else None
+        self.default_deadline = deadline
+        self.local = threading.local()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = deque(maxlen=1000)
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.hedge_lock = threading.Lock()
+        self.hedge_executor = ThreadPoolExecutor(max_workers=pool_size * 2) if hedge_percentile else None
+        self.cache = cache
+        self.lookups = lookups
+        self.hooks = list(hooks)
+        self.duplicates_removed = 0
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.session = requests.Session()
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=retries, backoff_factor=backoff_factor,
+                                                read=False, status_forcelist=[502, 503, 504],
+                                                allowed_methods=None, raise_on_status=False))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.stream_session = requests.Session()
+        self.stream_session.headers.update(self.session.headers)
+        stream_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.stream_session.mount('http://', stream_adapter)
+        self.stream_session.mount('https://', stream_adapter)
+        if self.hosts is not None and health_interval:
+            self.hosts.start(self._healthy, health_interval)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.releaser is not None:
+            self.releaser.close()
+        if self.hosts is not None:
+            self.hosts.stop()
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown(wait=False)
+        self.session.close()
+        self.stream_session.close()
+
+    def pool_stats(self) -> Dict:
+        adapters = {id(adapter): adapter for session in (self.session, self.stream_session)
+                    for adapter in session.adapters.values()}
+        pools = [pool for adapter in adapters.values()
+                 for pool in (adapter.poolmanager.pools[key] for key in adapter.poolmanager.pools.keys())]
+        connections = sum(pool.num_connections for pool in pools)
+        requests_made = sum(pool.num_requests for pool in pools)
+        return {"connections": connections,
+                "requests": requests_made,
+                "reused": requests_made - connections}
+
+    @contextmanager
+    def deadline(self, seconds: float = None):
+        seconds = self.default_deadline if seconds is None else seconds
+        previous = getattr(self.local, 'expires', None)
+        expires = previous if seconds is None else time.monotonic() + seconds
+        self.local.expires = expires if previous is None else min(previous, expires)
+        try:
+            yield self.local.expires
+        finally:
+            self.local.expires = previous
+
+    def _remaining(self) -> Optional[float]:
+        expires = getattr(self.local, 'expires', None)
+        if expires is None:
+            return None
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('Deadline exceeded')
+        return remaining
+
+    def _in_scope(self, expires: Optional[float], fn: Callable, *args):
+        previous = getattr(self.local, 'expires', None)
+        self.local.expires = expires
+        try:
+            return fn(*args)
+        finally:
+            self.local.expires = previous
+
+    def _count(self, name: str, operation: str):
+        for hook in self.hooks:
+            hook.count(name, operation)
+
+    def _request(self, method: str, path: str, operation: str = None, host: str = None,
+                 **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        remaining = self._remaining()
+        if remaining is None:
+            return self._limited(method, path, operation, host, **kwargs)
+        timeout = kwargs['timeout']
+        kwargs['timeout'] = remaining if timeout is None else \
+            tuple(remaining if t is None else min(t, remaining) for t in timeout) if isinstance(timeout, tuple) \
+            else min(timeout, remaining)
+        try:
+            return self._limited(method, path, operation, host, **kwargs)
+        except requests.Timeout as e:
+            if self.local.expires <= time.monotonic():
+                raise TimeoutError('Deadline exceeded') from e
+            raise
+
+    def _limited(self, method: str, path: str, operation: str = None, host: str = None,
+                 **kwargs) -> requests.Response:
+        if self.limiter is None or operation not in self.limited_operations:
+            return self._route(method, path, operation, host, **kwargs)
+        started = self.limiter.acquire(self._remaining())
+        ok = False
+        try:
+            r = self._route(method, path, operation, host, **kwargs)
+            ok = r.status_code < 500
+            return r
+        finally:
+            self.limiter.release(started, ok, operation)
+
+    def _route(self, method: str, path: str, operation: str = None, host: str = None,
+               **kwargs) -> requests.Response:
+        if self.hosts is None:
+            return self._send(method, host or self.host, path, operation, **kwargs)
+        replayable = isinstance(kwargs.get('data'), (str, bytes, type(None)))
+        tried = []
+        while True:
+            target = host or self.hosts.pick(exclude=tried)
+            self.hosts.acquire(target)
+            ok = False
+            try:
+                r = self._send(method, target, path, operation, **kwargs)
+                ok = r.status_code not in {502, 503, 504}
+                self.local.host = target
+                return r
+            except requests.ConnectionError:
+                tried.append(target)
+                if host is not None or not replayable or len(tried) == len(self.hosts.hosts):
+                    raise
+            finally:
+                self.hosts.release(target, ok)
+
+    def _send(self, method: str, host: str, path: str, operation: str = None, **kwargs) -> requests.Response:
+        data = kwargs.get('data')
+        session = self.session if isinstance(data, (str, bytes, type(None))) else self.stream_session
+        if not self.hooks:
+            return session.request(method, urljoin(host, path), **kwargs)
+        request = {"operation": operation or path,
+                   "method": method,
+                   "host": host,
+                   "path": path,
+                   "bytes_sent": len(data) if isinstance(data, (str, bytes)) else 0}
+        for hook in self.hooks:
+            hook.before_request(request)
+        response = error = None
+        start = time.perf_counter()
+        try:
+            response = session.request(method, urljoin(host, path), **kwargs)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self.hooks:
+                hook.after_request(request, response, elapsed, error)
 
     def _response(self, r: requests.Response):
         if r.status_code in {200, 500}:
-            return r.json()
+            return serialization.loads(r.content)
         else:
             return r
 
     def _graphql(self, body: dict, transform: Callable = None):
-        r = requests.post(urljoin(self.host, '_graphql'),
-                          headers={"Content-Type": "application/json"},
-                          data=json.dumps(body))
+        with self.deadline():
+            r = self._request('POST', '_graphql', body.get('operationName'),
+                              headers={"Content-Type": "application/json"},
+                              data=serialization.dumps(body))
         r = self._response(r)
         if type(r) == requests.Response:
             return r
@@ -39,19 +237,113 @@ class AcceleratedText:
             data = r['data'][keys[0]] if len(keys) == 1 else r['data']
             return transform(data) if transform else data
 
+    def _graphql_items(self, body: dict, prefix: str):
+        with self.deadline():
+            r = self._request('POST', '_graphql', body.get('operationName'),
+                              headers={"Content-Type": "application/json"},
+                              data=serialization.dumps(body), stream=True)
+            if r.status_code != 200:
+                r = self._response(r)
+                if type(r) == requests.Response:
+                    return r
+                raise Exception(r['errors'] if 'errors' in r else r)
+            r.raw.decode_content = True
+            try:
+                head, items = serialization.split_items(r.raw, prefix)
+            except BaseException:
+                r.close()
+                raise
+        if 'errors' in head:
+            r.close()
+            raise Exception(head['errors'])
+
+        def stream():
+            with r:
+                yield from items
+
+        return head, stream()
+
+    def _graphql_batch(self, document: str, variables: Iterable[Dict], transform: Callable = None,
+                       batch_size: int = 100) -> List:
+        results = []
+        variables = iter(variables)
+        while True:
+            chunk = list(islice(variables, batch_size))
+            if not chunk:
+                return results
+            body = {"operationName": "batch",
+                    "query": graphql.batch(document, len(chunk)),
+                    "variables": {f'a{i}_{k}': v for i, item in enumerate(chunk) for k, v in item.items()}}
+            r = self._request('POST', '_graphql', 'batch',
+                              headers={"Content-Type": "application/json"},
+                              data=serialization.dumps(body))
+            r = self._response(r)
+            if type(r) == requests.Response:
+                results.extend([r] * len(chunk))
+                continue
+            errors = {}
+            for error in r.get('errors', []):
+                errors.setdefault((error.get('path') or [None])[0], []).append(error)
+            data = r.get('data') or {}
+            for i in range(len(chunk)):
+                alias = f'a{i}'
+                if alias in errors:
+                    results.append(Exception(errors[alias]))
+                elif data.get(alias) is None and None in errors:
+                    results.append(Exception(errors[None]))
+                else:
+                    results.append(transform(data[alias]) if transform else data.get(alias))
+
     def health(self) -> Dict:
-        r = requests.get(urljoin(self.host, 'health'))
+        r = self._request('GET', 'health', 'health')
         return self._response(r)
 
+    def _healthy(self, host: str) -> bool:
+        r = self._request('GET', 'health', 'health', host=host)
+        return r.status_code == 200 and self._response(r).get('health') == 'Ok'
+
+    def host_stats(self) -> Dict[str, Dict]:
+        if self.hosts is None:
+            return {self.host: {"healthy": True, "outstanding": None, "failures": None}}
+        return self.hosts.stats()
+
+    def _pin(self, ids: Iterable[str], host: str):
+        with self.pinned_lock:
+            self.pinned.update(dict.fromkeys(ids, host))
+            while len(self.pinned) > self.max_pinned_results:
+                del self.pinned[next(iter(self.pinned))]
+
     def status(self) -> Dict:
-        r = requests.get(urljoin(self.host, 'status'))
+        r = self._request('GET', 'status', 'status')
+        return self._response(r)
+
+    def _upload(self, filename: str, chunks: Iterable[bytes]) -> Dict:
+        boundary = uuid.uuid4().hex
+
+        def body():
+            yield (f'--{boundary}\r\n'
+                   f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                   f'Content-Type: text/csv\r\n\r\n').encode()
+            yield from chunks
+            yield f'\r\n--{boundary}--\r\n'.encode()
+
+        r = self._request('POST', 'accelerated-text-data-files/', 'upload_data_file',
+                          headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                          data=body())
         return self._response(r)
 
-    def upload_data_file(self, path: str) -> Dict:
+    def upload_data_file(self, path: str, chunk_size: int = 65536) -> Dict:
         filename = os.path.split(path)[-1]
         with open(path, 'rb') as file:
-            r = requests.post(urljoin(self.host, 'accelerated-text-data-files/'), files={'file': (filename, file)})
-        return self._response(r)
+            return self._upload(filename, iter(lambda: file.read(chunk_size), b''))
+
+    def upload_rows(self, filename: str, header: Iterable[str], rows: Iterable[Iterable[Any]]) -> Dict:
+        chunks = transforms.data_file_to_csv_chunks({"header": header, "rows": rows})
+        return self._upload(filename, (chunk.encode('utf-8') for chunk in chunks))
+
+    def upload_data_frame(self, filename: str, df) -> Dict:
+        return self.upload_rows(filename, [str(column) for column in df.columns],
+                                df.itertuples(index=False, name=None))
 
     def create_data_file(self, filename: str, header: Iterable[str], rows: Iterable[Iterable[Any]],
                          id: str = None) -> Dict:
@@ -62,16 +354,35 @@ class AcceleratedText:
                               "content": transforms.data_file_to_csv({"header": header, "rows": rows})}}
         return self._graphql(body)
 
-    def get_data_file(self, id: str, record_offset: int = 0, record_limit: int = 1000000000) -> Dict:
+    def get_data_file(self, id: str, record_offset: int = 0, record_limit: int = 1000000000,
+                      columnar: bool = False) -> Dict:
         body = {"operationName": "getDataFile",
                 "query": graphql.get_data_file,
                 "variables": {"id": id,
                               "recordOffset": record_offset,
                               "recordLimit": record_limit}}
-        return self._graphql(body, transform=transforms.data_file)
+        if serialization.streaming and not columnar:
+            x = self._graphql_items(body, 'data.getDataFile.records')
+            if type(x) == requests.Response:
+                return x
+            head, records = x
+            data_file = head['data']['getDataFile']
+            return data_file and transforms.data_file(dict(data_file, records=records))
+        transform = transforms.data_file_columns if columnar else transforms.data_file
+        return self._graphql(body, transform=lambda x: x and transform(x))
 
     def list_data_files(self, offset: int = 0, limit: int = 1000, record_offset=0,
-                        record_limit: int = 1000000000) -> Iterable[Dict]:
+                        record_limit: int = 1000000000, fields: str = 'full') -> Iterable[Dict]:
+        if fields not in ('ids', 'metadata', 'full'):
+            raise ValueError(f'Unknown fields {fields}')
+        if fields != 'full':
+            body = {"operationName": "listDataFiles",
+                    "query": {"ids": graphql.list_data_files_ids,
+                              "metadata": graphql.list_data_files_metadata}[fields],
+                    "variables": {"offset": offset,
+                                  "limit": limit}}
+            transform = transforms.data_file_metadata if fields == 'metadata' else dict
+            return self._graphql(body, transform=lambda x: [transform(f) for f in x['dataFiles']])
         body = {"operationName": "listDataFiles",
                 "query": graphql.list_data_files,
                 "variables": {"offset": offset,
@@ -80,119 +391,587 @@ class AcceleratedText:
                               "recordLimit": record_limit}}
         return self._graphql(body, transform=lambda x: [transforms.data_file(f) for f in x['dataFiles']])
 
+    def _data_file_page(self, id: str, offset: int, limit: int) -> Dict:
+        body = {"operationName": "getDataFile",
+                "query": graphql.get_data_file,
+                "variables": {"id": id,
+                              "recordOffset": offset,
+                              "recordLimit": limit}}
+        page = self._graphql(body, transform=lambda x: x and transforms.data_file_page(x))
+        if page is None:
+            raise Exception(f'Data file {id} not found')
+        elif type(page) == requests.Response:
+            raise Exception(page)
+        return page
+
+    def _data_files_page(self, offset: int, limit: int) -> Dict:
+        body = {"operationName": "listDataFiles",
+                "query": graphql.list_data_files_metadata,
+                "variables": {"offset": offset,
+                              "limit": limit}}
+        page = self._graphql(body, transform=transforms.data_files_page)
+        if type(page) == requests.Response:
+            raise Exception(page)
+        return page
+
+    def _iter_pages(self, fetch: Callable[[int], Dict], items: str, total: str, prefetch: bool) -> Iterable:
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset = 0
+            page = fetch(offset)
+            while True:
+                offset += len(page[items])
+                more = len(page[items]) > 0 and offset < page[total]
+                following = None
+                if more and executor is not None:
+                    following = executor.submit(self._in_scope, getattr(self.local, 'expires', None), fetch, offset)
+                yield from page[items]
+                if not more:
+                    return
+                page = fetch(offset) if following is None else following.result()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def iter_data_file_rows(self, id: str, page_size: int = 1000, prefetch: bool = False) -> Iterable[List[Any]]:
+        return self._iter_pages(lambda offset: self._data_file_page(id, offset, page_size),
+                                'rows', 'record_count', prefetch)
+
+    def iter_data_files(self, page_size: int = 100, record_page_size: int = 1000,
+                        prefetch: bool = False) -> Iterable[Dict]:
+        for data_file in self._iter_pages(lambda offset: self._data_files_page(offset, page_size),
+                                          'data_files', 'total_count', prefetch):
+            data_file['rows'] = self.iter_data_file_rows(data_file['id'], page_size=record_page_size,
+                                                         prefetch=prefetch)
+            yield data_file
+
     def delete_data_file(self, id: str) -> Dict:
         body = {"id": id}
-        r = requests.delete(urljoin(self.host, f'accelerated-text-data-files/'),
-                            headers={"Content-Type": "application/json"},
-                            data=json.dumps(body))
+        r = self._request('DELETE', 'accelerated-text-data-files/', 'delete_data_file',
+                          headers={"Content-Type": "application/json"},
+                          data=serialization.dumps(body))
         return self._response(r)
 
-    def generate(self, document_plan_name: str, data: Dict[str, Any], reader_model: Iterable[str] = None) -> Dict:
+    def _invalidate(self):
+        if self.cache is not None:
+            self.cache.clear()
+        if self.lookups is not None:
+            self.lookups.clear()
+
+    def _cache_key(self, document_plan_name: str, data: Dict[str, Any], reader_model: Iterable[str] = None) -> str:
+        return cache.key(document_plan_name, data, reader_model or self.default_reader_model)
+
+    def generate(self, document_plan_name: str, data: Dict[str, Any], reader_model: Iterable[str] = None,
+                 deadline: float = None) -> Dict:
+        if self.cache is not None:
+            key = self._cache_key(document_plan_name, data, reader_model)
+            result = self.cache.get(key)
+            if result is not None:
+                return result
         body = {"documentPlanName": document_plan_name,
                 "dataRow": data,
                 "readerFlagValues": {reader: True for reader in reader_model or self.default_reader_model},
                 "async": False}
-        r = requests.post(urljoin(self.host, 'nlg/'),
+        with self.deadline(deadline):
+            if self.hedge_percentile is None:
+                r = self._generate_request(serialization.dumps(body))
+            else:
+                r = self._generate_hedged(serialization.dumps(body))
+        result = self._response(r)
+        if self.cache is not None and r.status_code == 200 and not result.get('error'):
+            self.cache.set(key, result)
+        return result
+
+    def _generate_request(self, data: Union[str, bytes]) -> requests.Response:
+        start = time.perf_counter()
+        r = self._request('POST', 'nlg/', 'generate',
                           headers={"Content-Type": "application/json"},
-                          data=json.dumps(body))
-        return self._response(r)
+                          data=data)
+        with self.hedge_lock:
+            self.latencies.append(time.perf_counter() - start)
+        return r
 
-    def generate_bulk(self, document_plan_name: str, data: Iterable[Dict[str, Any]],
-                      reader_model: Iterable[str] = None) -> Iterable[Dict]:
+    def _generate_hedged(self, data: Union[str, bytes]) -> requests.Response:
+        if len(self.latencies) < self.hedge_min_samples:
+            return self._generate_request(data)
+        with self.hedge_lock:
+            latencies = sorted(self.latencies)
+        delay = latencies[min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))]
+        expires = getattr(self.local, 'expires', None)
+        primary = self.hedge_executor.submit(self._in_scope, expires, self._generate_request, data)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        with self.hedge_lock:
+            self.hedges_fired += 1
+        self._count('hedges_fired', 'generate')
+        hedge = self.hedge_executor.submit(self._in_scope, expires, self._generate_request, data)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and future.result().status_code < 500:
+                    if future is hedge:
+                        with self.hedge_lock:
+                            self.hedges_won += 1
+                        self._count('hedges_won', 'generate')
+                    return future.result()
+        return primary.result()
+
+    def _submit_bulk(self, document_plan_name: str, data: Iterable[Dict[str, Any]],
+                     reader_model: Iterable[str] = None, expires: float = None):
         body = {"documentPlanName": document_plan_name,
                 "dataRows": OrderedDict([(str(uuid.uuid4()), row) for row in data]),
                 "readerFlagValues": {reader: True for reader in reader_model or self.default_reader_model}}
-        r = requests.post(urljoin(self.host, 'nlg/_bulk/'),
-                          headers={"Content-Type": "application/json"},
-                          data=json.dumps(body))
+        with self.deadline(None if expires is None else expires - time.monotonic()):
+            r = self._request('POST', 'nlg/_bulk/', 'generate_bulk',
+                              headers={"Content-Type": "application/json"},
+                              data=serialization.dumps(body))
+            host = self.local.host if self.hosts is not None else None
         results = self._response(r)
         if type(results) == requests.Response:
             return results
-        return (self.get_result(result_id) for result_id in body['dataRows'].keys())
-
-    def get_result(self, id: str, format: str = 'raw') -> Dict:
-        result = None
-        ready = False
-        while not ready:
-            r = requests.get(urljoin(self.host, f'nlg/{id}'), params={"format": format})
-            result = self._response(r)
-            if type(result) == requests.Response:
-                return result
-            elif result.get('error'):
-                return result
-            ready = result['ready']
-            time.sleep(0.01)
-        return result
+        if host is not None:
+            self._pin(body['dataRows'], host)
+        if self.unreleased is not None:
+            with self.unreleased_lock:
+                self.unreleased.update(dict.fromkeys(body['dataRows'], time.monotonic()))
+        return body['dataRows']
+
+    def generate_bulk(self, document_plan_name: str, data: Iterable[Dict[str, Any]],
+                      reader_model: Iterable[str] = None, ordered: bool = True, timeout: float = None,
+                      max_workers: int = 10, deduplicate: bool = True, deadline: float = None) -> Iterable[Dict]:
+        expires = None if deadline is None else time.monotonic() + deadline
+        if self.cache is None and not deduplicate:
+            data_rows = self._submit_bulk(document_plan_name, data, reader_model, expires)
+            if type(data_rows) == requests.Response:
+                return data_rows
+            return (result for _, result in self._iter_results(data_rows.keys(), ordered=ordered, timeout=timeout,
+                                                               max_workers=max_workers, expires=expires))
+        data = list(data)
+        keys = [self._cache_key(document_plan_name, row, reader_model) for row in data]
+        groups = keys if deduplicate else range(len(data))
+        positions = {}
+        for i, group in enumerate(groups):
+            positions.setdefault(group, []).append(i)
+        self.duplicates_removed += len(data) - len(positions)
+        found = {}
+        if self.cache is not None:
+            for group, members in positions.items():
+                result = self.cache.get(keys[members[0]])
+                if result is not None:
+                    found[group] = result
+        missing = [group for group in positions if group not in found]
+        data_rows = self._submit_bulk(document_plan_name, [data[positions[group][0]] for group in missing],
+                                      reader_model, expires) if missing else OrderedDict()
+        if type(data_rows) == requests.Response:
+            return data_rows
+        submitted = dict(zip(data_rows.keys(), missing))
+
+        def results():
+            position = 0
+
+            def ready():
+                nonlocal position
+                while position < len(groups) and groups[position] in found:
+                    group = groups[position]
+                    yield found[group]
+                    if positions[group][-1] == position:
+                        del found[group]
+                    position += 1
+
+            if ordered:
+                yield from ready()
+            else:
+                for group, result in found.items():
+                    yield from [result] * len(positions[group])
+            for id, result in self._iter_results(data_rows.keys(), ordered=ordered, timeout=timeout,
+                                                 max_workers=max_workers, expires=expires):
+                group = submitted[id]
+                if self.cache is not None and type(result) != requests.Response and not result.get('error'):
+                    self.cache.set(keys[positions[group][0]], result)
+                if ordered:
+                    found[group] = result
+                    yield from ready()
+                else:
+                    yield from [result] * len(positions[group])
+
+        return results()
+
+    def generate_bulk_stream(self, document_plan_name: str, data: Iterable[Dict[str, Any]],
+                             reader_model: Iterable[str] = None, batch_size: int = 1000, max_in_flight: int = 4,
+                             ordered: bool = True, timeout: float = None, max_workers: int = 10,
+                             deadline: float = None) -> Iterable[Tuple[Dict[str, Any], Dict]]:
+        expires = None if deadline is None else time.monotonic() + deadline
+        rows = iter(data)
+        batches = count()
+        outstanding = {}
+        owners = {}
+
+        def refill(done: Optional[str]) -> List[Tuple[Any, Optional[Dict]]]:
+            if done is not None:
+                number = owners[done][0]
+                outstanding[number] -= 1
+                if outstanding[number]:
+                    return []
+                del outstanding[number]
+            entries = []
+            while len(outstanding) < max_in_flight and len(owners) < max_in_flight * batch_size:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                number = next(batches)
+                data_rows = self._submit_bulk(document_plan_name, batch, reader_model, expires)
+                if type(data_rows) == requests.Response:
+                    for i, row in enumerate(batch):
+                        owners[number, i] = (number, row)
+                        entries.append(((number, i), data_rows))
+                    continue
+                outstanding[number] = len(data_rows)
+                for id, row in data_rows.items():
+                    owners[id] = (number, row)
+                    entries.append((id, None))
+            return entries
+
+        for id, result in self._iter_results((), ordered=ordered, timeout=timeout, max_workers=max_workers,
+                                             refill=refill, expires=expires):
+            yield owners.pop(id)[1], result
+
+    def _poll_result(self, id: str, format: str) -> Dict:
+        r = self._request('GET', f'nlg/{id}', 'get_result', host=self.pinned.get(id), params={"format": format})
+        return self._response(r)
+
+    def _result_ready(self, result) -> bool:
+        return type(result) == requests.Response or bool(result.get('error')) or result['ready']
+
+    def _poll_delay(self, delay: float) -> float:
+        return min(delay * 2, self.max_poll_interval) * random.uniform(0.5, 1)
+
+    def get_result(self, id: str, format: str = 'raw', deadline: float = None) -> Dict:
+        with self.deadline(deadline):
+            delay = self.poll_interval
+            result = self._poll_result(id, format)
+            while not self._result_ready(result):
+                remaining = self._remaining()
+                time.sleep(delay if remaining is None else min(delay, remaining))
+                delay = self._poll_delay(delay)
+                result = self._poll_result(id, format)
+            if self.releaser is not None and type(result) != requests.Response:
+                self.releaser.release([id])
+            return result
+
+    def get_results(self, ids: Iterable[str], format: str = 'raw', ordered: bool = True, timeout: float = None,
+                    max_workers: int = 10, deadline: float = None) -> Iterable[Dict]:
+        expires = None if deadline is None else time.monotonic() + deadline
+        return (result for _, result in self._iter_results(ids, format, ordered, timeout, max_workers, expires=expires))
+
+    def _iter_results(self, ids: Iterable[str], format: str = 'raw', ordered: bool = True, timeout: float = None,
+                      max_workers: int = 10,
+                      refill: Callable[[Optional[str]], Iterable[Tuple[Any, Optional[Dict]]]] = None,
+                      expires: float = None) -> Iterable[Tuple[Any, Dict]]:
+        remaining = self._remaining()
+        limit = None if remaining is None else time.monotonic() + remaining
+        limit = expires if limit is None else limit if expires is None else min(limit, expires)
+        delays = {}
+        expirations = {}
+        schedule = []
+        expiries = deque()
+        in_flight = {}
+        finished = {}
+        positions = count()
+        position = 0
+
+        def add(entries: Iterable[Tuple[Any, Optional[Dict]]]):
+            now = time.monotonic()
+            expires = None if timeout is None else now + timeout
+            expires = limit if expires is None else expires if limit is None else min(expires, limit)
+            polled = []
+            for id, result in entries:
+                i = next(positions)
+                if result is not None:
+                    finished[i] = (id, result)
+                    continue
+                delays[id] = self.poll_interval
+                expirations[id] = expires
+                polled.append(id)
+                heapq.heappush(schedule, (now, i, id))
+                if expires is not None:
+                    expiries.append((expires, id))
+            track(polled)
+
+        def track(ids: Iterable[Any], polling: bool = True):
+            if self.unreleased is not None:
+                with self.unreleased_lock:
+                    if polling:
+                        self.polling.update(ids)
+                    else:
+                        self.polling.difference_update(ids)
+
+        def ready() -> Iterable[Tuple[Any, Dict]]:
+            nonlocal position
+            if not ordered:
+                for i in list(finished):
+                    yield finished.pop(i)
+            while position in finished:
+                yield finished.pop(position)
+                position += 1
+
+        add((id, None) for id in ids)
+        yield from ready()
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                if refill is not None:
+                    entries = list(refill(None))
+                    add(entries)
+                    yield from ready()
+                    if entries and not schedule and not in_flight:
+                        continue
+                if not schedule and not in_flight:
+                    return
+                now = time.monotonic()
+                while expiries and expiries[0][1] not in delays:
+                    expiries.popleft()
+                deadline = expiries[0][0] if expiries else None
+                if deadline is not None and now >= deadline:
+                    for future in in_flight:
+                        future.cancel()
+                    raise TimeoutError(f'{len(delays)} of {next(positions)} results not ready')
+                while schedule and schedule[0][0] <= now and len(in_flight) < max_workers:
+                    _, i, id = heapq.heappop(schedule)
+                    future = executor.submit(self._in_scope, expirations[id], self._poll_result, id, format)
+                    in_flight[future] = (i, id)
+                waits = [deadline - now] if deadline is not None else []
+                if schedule and len(in_flight) < max_workers:
+                    waits.append(schedule[0][0] - now)
+                if not in_flight:
+                    time.sleep(max(0, min(waits)))
+                    continue
+                done, _ = wait(in_flight, timeout=max(0, min(waits)) if waits else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, id = in_flight.pop(future)
+                    result = future.result()
+                    if not self._result_ready(result):
+                        delays[id] = self._poll_delay(delays[id])
+                        heapq.heappush(schedule, (time.monotonic() + delays[id], i, id))
+                        continue
+                    del delays[id]
+                    del expirations[id]
+                    track([id], polling=False)
+                    if self.releaser is not None and type(result) != requests.Response:
+                        self.releaser.release([id])
+                    finished[i] = (id, result)
+                    if refill is not None:
+                        add(refill(id))
+                yield from ready()
+        finally:
+            executor.shutdown(wait=False)
+            track(list(delays), polling=False)
+
+    def _release_result(self, id: str) -> bool:
+        try:
+            r = self.delete_result(id)
+        except Exception:
+            return False
+        if type(r) == requests.Response and r.status_code >= 500:
+            return False
+        if self.unreleased is not None:
+            with self.unreleased_lock:
+                self.unreleased.pop(id, None)
+        return True
+
+    def sweep_results(self, ids: Iterable[str] = None, older_than: float = 300.0,
+                      max_workers: int = 8) -> Dict[str, List[str]]:
+        if ids is None:
+            now = time.monotonic()
+            with self.unreleased_lock:
+                ids = [id for id, submitted in (self.unreleased or {}).items()
+                       if now - submitted >= older_than and id not in self.polling]
+        ids = list(ids)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            deleted = list(executor.map(self._release_result, ids))
+        return {"deleted": [id for id, ok in zip(ids, deleted) if ok],
+                "failed": [id for id, ok in zip(ids, deleted) if not ok]}
 
     def delete_result(self, id: str) -> Dict:
-        r = requests.delete(urljoin(self.host, f'nlg/{id}'))
+        with self.pinned_lock:
+            host = self.pinned.pop(id, None)
+        r = self._request('DELETE', f'nlg/{id}', 'delete_result', host=host)
         return self._response(r)
 
-    def create_dictionary_item(self, key: str, category: str, forms: List[str], id: str = None,
-                               language: str = "Eng", attributes: Dict[str, Any] = None) -> Dict:
+    def _dictionary_item_variables(self, key: str, category: str, forms: List[str], id: str = None,
+                                   language: str = "Eng", attributes: Dict[str, Any] = None) -> Dict:
         if not attributes:
             attributes = {}
+        return {"id": id or "_".join([key, category, language]),
+                "name": key,
+                "key": key,
+                "partOfSpeech": category,
+                "forms": forms,
+                "language": language,
+                "attributes": [{"name": k, "value": v} for k, v in attributes.items()]}
+
+    def create_dictionary_item(self, key: str, category: str, forms: List[str], id: str = None,
+                               language: str = "Eng", attributes: Dict[str, Any] = None) -> Dict:
         body = {"operationName": "createDictionaryItem",
                 "query": graphql.create_dictionary_item,
-                "variables": {"id": id or "_".join([key, category, language]),
-                              "name": key,
-                              "key": key,
-                              "partOfSpeech": category,
-                              "forms": forms,
-                              "language": language,
-                              "attributes": [{"name": k, "value": v} for k, v in attributes.items()]}}
-        return self._graphql(body, transform=transforms.dictionary_item)
+                "variables": self._dictionary_item_variables(key, category, forms, id, language, attributes)}
+        try:
+            return self._graphql(body, transform=transforms.dictionary_item)
+        finally:
+            self._invalidate()
+
+    def create_dictionary_items(self, items: Iterable[Dict], batch_size: int = 100) -> List:
+        try:
+            return self._graphql_batch(graphql.create_dictionary_item,
+                                       (self._dictionary_item_variables(**item) for item in items),
+                                       transform=transforms.dictionary_item, batch_size=batch_size)
+        finally:
+            self._invalidate()
 
     def get_dictionary_item(self, id: str) -> Dict:
         body = {"operationName": "getDictionaryItem",
                 "query": graphql.get_dictionary_item,
                 "variables": {"dictionaryItemId": id}}
-        return self._graphql(body, transform=transforms.dictionary_item)
+        load = partial(self._graphql, body, transform=transforms.dictionary_item)
+        return load() if self.lookups is None else self.lookups.get(('dictionary-item', id), load)
 
     def delete_dictionary_item(self, id: str) -> bool:
         body = {"operationName": "deleteDictionaryItem",
                 "query": graphql.delete_dictionary_item,
                 "variables": {"id": id}}
-        return self._graphql(body)
+        try:
+            return self._graphql(body)
+        finally:
+            self._invalidate()
 
-    def list_dictionary_items(self) -> Iterable[Dict]:
+    def delete_dictionary_items(self, ids: Iterable[str], batch_size: int = 100) -> List:
+        try:
+            return self._graphql_batch(graphql.delete_dictionary_item, ({"id": id} for id in ids),
+                                       batch_size=batch_size)
+        finally:
+            self._invalidate()
+
+    def list_dictionary_items(self, fields: str = 'full') -> Iterable[Dict]:
+        if fields not in ('ids', 'metadata', 'full'):
+            raise ValueError(f'Unknown fields {fields}')
         body = {"operationName": "dictionary",
-                "query": graphql.dictionary}
-        return self._graphql(body, transform=lambda x: [transforms.dictionary_item(item) for item in x['items']])
+                "query": {"ids": graphql.dictionary_ids,
+                          "metadata": graphql.dictionary_metadata,
+                          "full": graphql.dictionary}[fields]}
+        transform = {"ids": dict,
+                     "metadata": transforms.dictionary_item_metadata,
+                     "full": transforms.dictionary_item}[fields]
+        load = partial(self._graphql, body, transform=lambda x: [transform(item) for item in x['items']])
+        return load() if self.lookups is None else self.lookups.get(('dictionary', fields), load)
 
     def get_document_plan(self, id: str = None, name: str = None) -> Dict:
         body = {"operationName": "documentPlan",
                 "query": graphql.document_plan,
                 "variables": {"id": id,
                               "name": name}}
-        return self._graphql(body, transform=transforms.document_plan)
+        if self.lookups is None:
+            return self._graphql(body, transform=transforms.document_plan)
+        entry = self.lookups.get(('document-plan', id, name), partial(self._document_plan_entry, body),
+                                 valid=self._document_plan_current)
+        return entry['documentPlan'] if isinstance(entry, dict) else entry
+
+    def _document_plan_entry(self, body: dict):
+        document_plan = self._graphql(dict(body, query=graphql.document_plan_versioned),
+                                      transform=transforms.document_plan)
+        if type(document_plan) != dict:
+            return document_plan
+        return {"documentPlan": document_plan,
+                "version": {"updateCount": document_plan.pop('updateCount'),
+                            "updatedAt": document_plan.pop('updatedAt')}}
+
+    def _document_plan_current(self, entry: Dict) -> bool:
+        id = entry['documentPlan']['id']
+        version = self.lookups.get(('document-plan-version', id), partial(self._document_plan_version, id),
+                                   ttl=self.lookups.revalidate_interval)
+        return type(version) == requests.Response or version == entry['version']
+
+    def _document_plan_version(self, id: str):
+        body = {"operationName": "documentPlan",
+                "query": graphql.document_plan_version,
+                "variables": {"id": id}}
+        version = self._graphql(body)
+        if type(version) != dict:
+            return version
+        return {"updateCount": version['updateCount'],
+                "updatedAt": version['updatedAt']}
 
-    def list_document_plans(self, kind: str = None, offset: int = 0, limit: int = 10000) -> Iterable[Dict]:
+    def list_document_plans(self, kind: str = None, offset: int = 0, limit: int = 10000,
+                            fields: str = 'full') -> Iterable[Dict]:
+        if fields not in ('ids', 'metadata', 'full'):
+            raise ValueError(f'Unknown fields {fields}')
         body = {"operationName": "documentPlans",
-                "query": graphql.document_plans,
+                "query": {"ids": graphql.document_plans_ids,
+                          "metadata": graphql.document_plans_metadata,
+                          "full": graphql.document_plans}[fields],
                 "variables": {"offset": offset,
                               "limit": limit,
                               "kind": kind}}
         return self._graphql(body, transform=lambda x: [transforms.document_plan(dp) for dp in x['items']])
 
+    def _document_plan_variables(self, id: str, uid: str, name: str, kind: str, examples: List[str],
+                                 blocklyXml: str, documentPlan: Dict) -> Dict:
+        return {"id": id,
+                "uid": uid,
+                "name": name,
+                "kind": kind,
+                "examples": examples,
+                "blocklyXml": blocklyXml,
+                "documentPlan": serialization.dumps_text(documentPlan)}
+
     def create_document_plan(self, id: str, uid: str, name: str, kind: str, examples: List[str],
                              blocklyXml: str, documentPlan: Dict) -> Dict:
         body = {"operationName": "createDocumentPlan",
                 "query": graphql.create_document_plan,
-                "variables": {"id": id,
-                              "uid": uid,
-                              "name": name,
-                              "kind": kind,
-                              "examples": examples,
-                              "blocklyXml": blocklyXml,
-                              "documentPlan": json.dumps(documentPlan)}}
-        return self._graphql(body, transform=transforms.document_plan)
+                "variables": self._document_plan_variables(id, uid, name, kind, examples, blocklyXml, documentPlan)}
+        try:
+            return self._graphql(body, transform=transforms.document_plan)
+        finally:
+            self._invalidate()
+
+    def create_document_plans(self, document_plans: Iterable[Dict], batch_size: int = 10) -> List:
+        try:
+            return self._graphql_batch(graphql.create_document_plan,
+                                       (self._document_plan_variables(**dp) for dp in document_plans),
+                                       transform=transforms.document_plan, batch_size=batch_size)
+        finally:
+            self._invalidate()
+
+    def update_document_plan(self, id: str, uid: str, name: str, kind: str, examples: List[str],
+                             blocklyXml: str, documentPlan: Dict) -> Dict:
+        body = {"operationName": "updateDocumentPlan",
+                "query": graphql.update_document_plan,
+                "variables": self._document_plan_variables(id, uid, name, kind, examples, blocklyXml, documentPlan)}
+        try:
+            return self._graphql(body, transform=transforms.document_plan)
+        finally:
+            self._invalidate()
+
+    def _document_plan_versions(self) -> Dict[str, Dict]:
+        return {dp['id']: {"updateCount": dp['updateCount'], "updatedAt": dp['updatedAt']}
+                for dp in self.list_document_plans(fields='metadata')}
 
     def delete_document_plan(self, id: str) -> bool:
         body = {"operationName": "deleteDocumentPlan",
                 "query": graphql.delete_document_plan,
                 "variables": {"id": id}}
-        return self._graphql(body)
+        try:
+            return self._graphql(body)
+        finally:
+            self._invalidate()
+
+    def delete_document_plans(self, ids: Iterable[str], batch_size: int = 100) -> List:
+        try:
+            return self._graphql_batch(graphql.delete_document_plan, ({"id": id} for id in ids),
+                                       batch_size=batch_size)
+        finally:
+            self._invalidate()
 
     def get_language(self, id: str) -> Dict:
         body = {"operationName": "language",
@@ -200,21 +979,32 @@ class AcceleratedText:
                 "variables": {"id": id}}
         return self._graphql(body, transform=transforms.reader_flag)
 
+    def _reader_flag_variables(self, id: str, name: str, flag: str = None, default: bool = False) -> Dict:
+        return {"id": id,
+                "name": name,
+                "flag": flag,
+                "defaultUsage": "YES" if default else "NO"}
+
     def add_language(self, id: str, name: str, flag: str = None, default: bool = False) -> Dict:
         body = {"operationName": "addLanguage",
                 "query": graphql.add_language,
-                "variables": {"id": id,
-                              "name": name,
-                              "flag": flag,
-                              "defaultUsage": "YES" if default else "NO"}}
+                "variables": self._reader_flag_variables(id, name, flag, default)}
         return self._graphql(body, transform=transforms.reader_flag)
 
+    def add_languages(self, languages: Iterable[Dict], batch_size: int = 100) -> List:
+        return self._graphql_batch(graphql.add_language,
+                                   (self._reader_flag_variables(**language) for language in languages),
+                                   transform=transforms.reader_flag, batch_size=batch_size)
+
     def delete_language(self, id: str) -> bool:
         body = {"operationName": "deleteLanguage",
                 "query": graphql.delete_language,
                 "variables": {"id": id}}
         return self._graphql(body)
 
+    def delete_languages(self, ids: Iterable[str], batch_size: int = 100) -> List:
+        return self._graphql_batch(graphql.delete_language, ({"id": id} for id in ids), batch_size=batch_size)
+
     def list_languages(self) -> Iterable[Dict]:
         body = {"operationName": "languages",
                 "query": graphql.languages}
@@ -229,73 +1019,266 @@ class AcceleratedText:
     def create_reader(self, id: str, name: str, flag: str, default: bool = False) -> Dict:
         body = {"operationName": "createReaderFlag",
                 "query": graphql.create_reader_flag,
-                "variables": {"id": id,
-                              "name": name,
-                              "flag": flag,
-                              "defaultUsage": "YES" if default else "NO"}}
+                "variables": self._reader_flag_variables(id, name, flag, default)}
         return self._graphql(body, transform=transforms.reader_flag)
 
+    def create_readers(self, readers: Iterable[Dict], batch_size: int = 100) -> List:
+        return self._graphql_batch(graphql.create_reader_flag,
+                                   (self._reader_flag_variables(**reader) for reader in readers),
+                                   transform=transforms.reader_flag, batch_size=batch_size)
+
     def delete_reader(self, id: str) -> bool:
         body = {"operationName": "deleteReaderFlag",
                 "query": graphql.delete_reader_flag,
                 "variables": {"id": id}}
         return self._graphql(body)
 
+    def delete_readers(self, ids: Iterable[str], batch_size: int = 100) -> List:
+        return self._graphql_batch(graphql.delete_reader_flag, ({"id": id} for id in ids), batch_size=batch_size)
+
     def list_readers(self) -> Iterable[Dict]:
         body = {"operationName": "readerFlags",
                 "query": graphql.reader_flags}
         return self._graphql(body, transform=lambda x: [transforms.reader_flag(flag) for flag in x.get('flags', [])])
 
-    def clear_state(self):
-        for lang in self.list_languages():
-            if lang['id'] in self.default_reader_model:
-                self.add_language(lang['id'], lang['name'], lang['flag'], True)
-            else:
-                self.delete_language(lang['id'])
-        for reader in self.list_readers():
-            if reader['id'] in self.default_reader_model:
-                self.create_reader(reader['id'], reader['name'], reader['flag'], True)
-            else:
-                self.delete_reader(reader['id'])
-        for dict_item in self.list_dictionary_items():
-            self.delete_dictionary_item(dict_item['id'])
-        for data_file in self.list_data_files():
-            self.delete_data_file(data_file['id'])
-        for document_plan in self.list_document_plans():
-            self.delete_document_plan(document_plan['id'])
-
-    def export_state(self, output_path: str, overwrite: bool = True):
+    def clear_state(self, dry_run: bool = False, max_workers: int = 8,
+                    batch_size: int = 100) -> Dict[str, Dict[str, Any]]:
+        summary = {}
+
+        def clear(kind: str, ids: List[str], delete: Callable[[List[str]], List], chunk_size: int = batch_size):
+            start = time.monotonic()
+            failed = []
+            if not dry_run:
+                futures = {executor.submit(delete, ids[i:i + chunk_size]): ids[i:i + chunk_size]
+                           for i in range(0, len(ids), chunk_size)}
+                for future in as_completed(futures):
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        results = [e] * len(futures[future])
+                    failed.extend((id, result) for id, result in zip(futures[future], results)
+                                  if isinstance(result, Exception) or type(result) == requests.Response)
+            summary[kind] = {"ids": ids,
+                             "count": len(ids) - len(failed),
+                             "failed": failed,
+                             "elapsed": time.monotonic() - start}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for kind, items, add, delete in [("languages", self.list_languages(), self.add_languages,
+                                              self.delete_languages),
+                                             ("readers", self.list_readers(), self.create_readers,
+                                              self.delete_readers)]:
+                defaults = [dict(x, default=True) for x in items if x['id'] in self.default_reader_model]
+                if defaults and not dry_run:
+                    add(defaults)
+                clear(kind, [x['id'] for x in items if x['id'] not in self.default_reader_model], delete)
+            clear("dictionary", [x['id'] for x in self.list_dictionary_items(fields='ids')],
+                  self.delete_dictionary_items)
+            clear("data-files", [x['id'] for x in self.list_data_files(fields='ids')],
+                  lambda ids: [self.delete_data_file(id) for id in ids], chunk_size=1)
+            clear("document-plans", [x['id'] for x in self.list_document_plans(fields='ids')],
+                  self.delete_document_plans)
+        return summary
+
+    def export_state(self, output_path: str, overwrite: bool = True, compression: int = 0,
+                     compresslevel: int = None, progress: Callable[[str], None] = None, page_size: int = 1000):
+        import edn_format
+        from zipfile import ZipFile
+
         if overwrite and os.path.exists(output_path):
             os.remove(output_path)
-        with ZipFile(output_path, 'a') as file:
-            languages = [transforms.reader_flag_to_edn(language) for language in self.list_languages()]
+        with ThreadPoolExecutor(max_workers=5) as executor, \
+                ZipFile(output_path, 'a', compression=compression, compresslevel=compresslevel) as file:
+            languages = executor.submit(self.list_languages)
+            readers = executor.submit(self.list_readers)
+            document_plans = executor.submit(self.list_document_plans)
+            versions = executor.submit(self._document_plan_versions)
+            dictionary = executor.submit(self.list_dictionary_items)
+            manifest = {}
+
+            def written(name: str):
+                if progress:
+                    progress(name)
+
+            manifest['data-files'] = {}
+            manifest['data-file-records'] = {}
+            for data_file in self.iter_data_files(record_page_size=page_size):
+                name = f'data-files/{data_file["filename"]}'
+                content_hash = hashlib.sha256()
+                with file.open(name, 'w') as df:
+                    for chunk in transforms.data_file_to_csv_chunks(data_file):
+                        chunk = chunk.encode('utf-8')
+                        content_hash.update(chunk)
+                        df.write(chunk)
+                manifest['data-files'][data_file['filename']] = content_hash.hexdigest()
+                manifest['data-file-records'][data_file['filename']] = data_file['record_count']
+                written(name)
+            manifest['languages'] = {x['id']: transforms.content_hash(x) for x in languages.result()}
+            languages = [transforms.reader_flag_to_edn(language) for language in languages.result()]
             file.writestr('config/languages.edn', edn_format.dumps(languages, indent=4))
-            readers = [transforms.reader_flag_to_edn(reader) for reader in self.list_readers()]
+            written('config/languages.edn')
+            manifest['readers'] = {x['id']: transforms.content_hash(x) for x in readers.result()}
+            readers = [transforms.reader_flag_to_edn(reader) for reader in readers.result()]
             file.writestr('config/readers.edn', edn_format.dumps(readers, indent=4))
-            for document_plan in self.list_document_plans():
-                file.writestr(f'document-plans/{document_plan["id"]}.json', json.dumps(document_plan, indent=4))
-            dictionary = self.list_dictionary_items()
-            file.writestr('dictionary/dictionary.edn', edn_format.dumps(dictionary, indent=4))
-            for data_file in self.list_data_files():
-                file.writestr(f'data-files/{data_file["filename"]}', transforms.data_file_to_csv(data_file))
-
-    def restore_state(self, path: str):
-        with ZipFile(path, 'r') as file:
+            written('config/readers.edn')
+            manifest['document-plans'] = {}
+            for document_plan in document_plans.result():
+                name = f'document-plans/{document_plan["id"]}.json'
+                file.writestr(name, json.dumps(document_plan, indent=4))
+                manifest['document-plans'][document_plan['id']] = dict(versions.result().get(document_plan['id'], {}),
+                                                                       hash=transforms.content_hash(document_plan))
+                written(name)
+            manifest['dictionary'] = {x['id']: transforms.content_hash(x) for x in dictionary.result()}
+            file.writestr('dictionary/dictionary.edn', edn_format.dumps(dictionary.result(), indent=4))
+            written('dictionary/dictionary.edn')
+            file.writestr('manifest.json', json.dumps(manifest, indent=4))
+            written('manifest.json')
+
+    def restore_state(self, path: str, max_workers: int = 8, batch_size: int = 100,
+                      chunk_size: int = 65536) -> List[Tuple[str, Any]]:
+        import edn_format
+        from zipfile import ZipFile
+
+        failures = []
+
+        def load_edn(name: str) -> List:
+            with file.open(name) as f:
+                return list(edn_format.loads(f.read().decode('utf-8')))
+
+        def create_document_plan(name: str) -> List:
+            with file.open(name) as f:
+                return [self.create_document_plan(**json.load(f))]
+
+        def upload_data_file(name: str) -> List:
+            with file.open(name) as f:
+                return [self._upload(os.path.split(name)[-1], iter(lambda: f.read(chunk_size), b''))]
+
+        def run(tasks: Iterable[Tuple[List[str], Callable]]):
+            futures = {executor.submit(fn): labels for labels, fn in tasks}
+            for future in as_completed(futures):
+                labels = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [e] * len(labels)
+                failures.extend((label, result) for label, result in zip(labels, results)
+                                if isinstance(result, Exception) or type(result) == requests.Response)
+
+        with ZipFile(path, 'r') as file, ThreadPoolExecutor(max_workers=max_workers) as executor:
             file_list = list(map(lambda x: x.filename, file.filelist))
-            with file.open('config/languages.edn') as languages:
-                for language in edn_format.loads(languages.read()):
-                    self.add_language(**transforms.reader_flag_from_edn(language))
-            with file.open('config/readers.edn') as readers:
-                for reader in edn_format.loads(readers.read()):
-                    self.create_reader(**transforms.reader_flag_from_edn(reader))
-            for document_plan in filter(lambda x: x.startswith('document-plans'), file_list):
-                with file.open(document_plan) as dp:
-                    self.create_document_plan(**json.load(dp))
+            languages = [transforms.reader_flag_from_edn(x) for x in load_edn('config/languages.edn')]
+            readers = [transforms.reader_flag_from_edn(x) for x in load_edn('config/readers.edn')]
+            run([([f'config/languages.edn:{x["id"]}' for x in languages], partial(self.add_languages, languages)),
+                 ([f'config/readers.edn:{x["id"]}' for x in readers], partial(self.create_readers, readers))])
+            tasks = [([name], partial(create_document_plan, name))
+                     for name in filter(lambda x: x.startswith('document-plans'), file_list)]
             for dictionary in filter(lambda x: x.startswith('dictionary'), file_list):
-                with file.open(dictionary) as d:
-                    for dict_item in edn_format.loads(d.read()):
-                        self.create_dictionary_item(**transforms.dictionary_item_from_edn(dict_item))
-            for data_file in filter(lambda x: x.startswith('data-files'), file_list):
-                with file.open(data_file) as df:
-                    filename = os.path.split(data_file)[-1]
-                    self.create_data_file(**transforms.data_file_from_csv(filename, df.read()))
+                items = [transforms.dictionary_item_from_edn(x) for x in load_edn(dictionary)]
+                tasks.extend(([f'{dictionary}:{item["id"]}' for item in items[i:i + batch_size]],
+                              partial(self.create_dictionary_items, items[i:i + batch_size], batch_size))
+                             for i in range(0, len(items), batch_size))
+            run(tasks)
+            run(([name], partial(upload_data_file, name))
+                for name in filter(lambda x: x.startswith('data-files'), file_list))
+        return failures
+
+    def _data_file_hashes(self, record_counts: Dict[str, int],
+                          page_size: int = 1000) -> Dict[str, Tuple[str, Optional[str]]]:
+        hashes = {}
+        for data_file in self.iter_data_files(record_page_size=page_size):
+            if record_counts.get(data_file['filename']) != data_file['record_count']:
+                hashes[data_file['filename']] = (data_file['id'], None)
+                continue
+            content_hash = hashlib.sha256()
+            for chunk in transforms.data_file_to_csv_chunks(data_file):
+                content_hash.update(chunk.encode('utf-8'))
+            hashes[data_file['filename']] = (data_file['id'], content_hash.hexdigest())
+        return hashes
+
+    def sync_state(self, path: str, delete: bool = True, dry_run: bool = False,
+                   chunk_size: int = 65536) -> Dict[str, Dict[str, List]]:
+        import csv
+        import io
+        import edn_format
+        from zipfile import ZipFile
+
+        with ZipFile(path, 'r') as file:
+            file_list = list(map(lambda x: x.filename, file.filelist))
+            manifest = json.loads(file.read('manifest.json')) if 'manifest.json' in file_list else {}
+
+            def load_edn(name: str) -> List:
+                return list(edn_format.loads(file.read(name).decode('utf-8')))
+
+            def record_count(filename: str, name: str) -> int:
+                if filename in manifest.get('data-file-records', {}):
+                    return manifest['data-file-records'][filename]
+                with file.open(name) as f:
+                    return sum(1 for _ in csv.reader(io.TextIOWrapper(f, encoding='utf-8'))) - 1
+
+            languages = {x['id']: x for x in map(transforms.reader_flag_from_edn, load_edn('config/languages.edn'))}
+            readers = {x['id']: x for x in map(transforms.reader_flag_from_edn, load_edn('config/readers.edn'))}
+            dictionary = {x['id']: x for name in file_list if name.startswith('dictionary')
+                          for x in map(transforms.dictionary_item_from_edn, load_edn(name))}
+            document_plans = {dp['id']: dp for dp in (json.loads(file.read(name)) for name in file_list
+                                                      if name.startswith('document-plans'))}
+            data_files = {os.path.split(name)[-1]: name for name in file_list if name.startswith('data-files')}
+            archive = {
+                "languages": {id: transforms.content_hash(x) for id, x in languages.items()},
+                "readers": {id: transforms.content_hash(x) for id, x in readers.items()},
+                "dictionary": {id: transforms.content_hash(x) for id, x in dictionary.items()},
+                "document-plans": {id: transforms.content_hash(dp) for id, dp in document_plans.items()},
+                "data-files": {filename: manifest.get('data-files', {}).get(filename) or
+                               hashlib.sha256(file.read(name)).hexdigest() for filename, name in data_files.items()}}
+
+            versions = self._document_plan_versions()
+            archived_versions = manifest.get('document-plans', {})
+            live_data_files = self._data_file_hashes({filename: record_count(filename, name)
+                                                      for filename, name in data_files.items()})
+            live = {
+                "languages": {x['id']: transforms.content_hash(x) for x in self.list_languages()},
+                "readers": {x['id']: transforms.content_hash(x) for x in self.list_readers()},
+                "dictionary": {x['id']: transforms.content_hash(x) for x in self.list_dictionary_items()},
+                "document-plans": {id: archive['document-plans'][id]
+                                   if {k: archived_versions.get(id, {}).get(k) for k in version} == version
+                                   else transforms.content_hash(self.get_document_plan(id=id))
+                                   if id in document_plans else None
+                                   for id, version in versions.items()},
+                "data-files": {filename: content_hash for filename, (_, content_hash) in live_data_files.items()}}
+
+            summary = {}
+            for kind in archive:
+                changed = [id for id, content_hash in archive[kind].items() if live[kind].get(id) != content_hash]
+                summary[kind] = {"created": [id for id in changed if id not in live[kind]],
+                                 "updated": [id for id in changed if id in live[kind]],
+                                 "deleted": [id for id in live[kind] if id not in archive[kind]] if delete else [],
+                                 "failed": []}
+            if dry_run:
+                return summary
+
+            def record(kind: str, ids: List[str], results: List):
+                summary[kind]['failed'].extend((id, result) for id, result in zip(ids, results)
+                                               if isinstance(result, Exception) or
+                                               type(result) == requests.Response)
+
+            for kind, items, create, remove in [("languages", languages, self.add_languages, self.delete_languages),
+                                                ("readers", readers, self.create_readers, self.delete_readers),
+                                                ("dictionary", dictionary, self.create_dictionary_items,
+                                                 self.delete_dictionary_items)]:
+                changed = summary[kind]['created'] + summary[kind]['updated']
+                record(kind, changed, create([items[id] for id in changed]))
+                record(kind, summary[kind]['deleted'], remove(summary[kind]['deleted']))
+            created = summary['document-plans']['created']
+            record('document-plans', created, self.create_document_plans([document_plans[id] for id in created]))
+            for id in summary['document-plans']['updated']:
+                try:
+                    self.update_document_plan(**document_plans[id])
+                except Exception as e:
+                    record('document-plans', [id], [e])
+            deleted = summary['document-plans']['deleted']
+            record('document-plans', deleted, self.delete_document_plans(deleted))
+            for filename in summary['data-files']['updated'] + summary['data-files']['deleted']:
+                record('data-files', [filename], [self.delete_data_file(live_data_files[filename][0])])
+            for filename in summary['data-files']['created'] + summary['data-files']['updated']:
+                with file.open(data_files[filename]) as f:
+                    record('data-files', [filename], [self._upload(filename, iter(lambda: f.read(chunk_size), b''))])
+        return summary
@@ -1,3 +1,6 @@
+import re
+
+
 create_dictionary_item = """mutation CreateDictionaryItem($id: ID, $name: String!, $partOfSpeech: PartOfSpeech, $key: String, $forms: [String], $language: Language, $sense: String, $definition: String, $attributes: [Attribute]) {
     createDictionaryItem(id: $id, name: $name, partOfSpeech: $partOfSpeech, key: $key, forms: $forms, language: $language, sense: $sense, definition: $definition, attributes: $attributes) {
         id
@@ -44,6 +47,30 @@ delete_dictionary_item = """mutation DeleteDictionaryItem($id: ID!) {
 }
 """
 
+update_document_plan = """mutation updateDocumentPlan($id: ID!, $uid: ID, $name: String, $kind: String, $examples: [String], $blocklyXml: String, $documentPlan: String, $dataSampleId: ID, $dataSampleRow: Int) {
+    updateDocumentPlan(id: $id, uid: $uid, name: $name, kind: $kind, examples: $examples, blocklyXml: $blocklyXml, documentPlan: $documentPlan, dataSampleId: $dataSampleId, dataSampleRow: $dataSampleRow) {
+        ...documentPlanFields
+        __typename
+    }
+}
+
+fragment documentPlanFields on DocumentPlan {
+    id
+    uid
+    name
+    kind
+    examples
+    blocklyXml
+    documentPlan
+    dataSampleId
+    dataSampleRow
+    createdAt
+    updatedAt
+    updateCount
+    __typename
+}
+"""
+
 delete_document_plan = """mutation deleteDocumentPlan($id: ID!) {
     deleteDocumentPlan(id: $id)
 }
@@ -111,6 +138,33 @@ list_data_files = """query listDataFiles(
 }
 """
 
+list_data_files_ids = """query listDataFiles($offset: Int, $limit: Int) {
+  listDataFiles(offset: $offset, limit: $limit, recordLimit: 0) {
+    offset
+    limit
+    totalCount
+    dataFiles {
+      id
+    }
+  }
+}
+"""
+
+list_data_files_metadata = """query listDataFiles($offset: Int, $limit: Int) {
+  listDataFiles(offset: $offset, limit: $limit, recordLimit: 0) {
+    offset
+    limit
+    totalCount
+    dataFiles {
+      id
+      fileName
+      fieldNames
+      recordCount
+    }
+  }
+}
+"""
+
 dictionary = """query dictionary {
     dictionary {
         items {
@@ -131,6 +185,27 @@ dictionary = """query dictionary {
 }
 """
 
+dictionary_ids = """query dictionary {
+    dictionary {
+        items {
+            id
+        }
+    }
+}
+"""
+
+dictionary_metadata = """query dictionary {
+    dictionary {
+        items {
+            id
+            name
+            partOfSpeech
+            language
+        }
+    }
+}
+"""
+
 document_plan = """query documentPlan($id: ID, $name: String) {
   documentPlan(id: $id, name: $name) {
     id
@@ -144,6 +219,31 @@ document_plan = """query documentPlan($id: ID, $name: String) {
 }
 """
 
+document_plan_versioned = """query documentPlan($id: ID, $name: String) {
+  documentPlan(id: $id, name: $name) {
+    id
+    uid
+    name
+    kind
+    examples
+    blocklyXml
+    documentPlan
+    updatedAt
+    updateCount
+  }
+}
+"""
+
+
+document_plan_version = """query documentPlan($id: ID) {
+  documentPlan(id: $id) {
+    id
+    updatedAt
+    updateCount
+  }
+}
+"""
+
 
 document_plans = """query documentPlans($offset: Int!, $limit: Int!, $kind: String) {
     documentPlans(offset: $offset, limit: $limit, kind: $kind) {
@@ -163,6 +263,37 @@ document_plans = """query documentPlans($offset: Int!, $limit: Int!, $kind: Stri
 }
 """
 
+document_plans_ids = """query documentPlans($offset: Int!, $limit: Int!, $kind: String) {
+    documentPlans(offset: $offset, limit: $limit, kind: $kind) {
+        items {
+            id
+        }
+        offset
+        limit
+        totalCount
+    }
+}
+"""
+
+document_plans_metadata = """query documentPlans($offset: Int!, $limit: Int!, $kind: String) {
+    documentPlans(offset: $offset, limit: $limit, kind: $kind) {
+        items {
+            id
+            uid
+            name
+            kind
+            examples
+            createdAt
+            updatedAt
+            updateCount
+        }
+        offset
+        limit
+        totalCount
+    }
+}
+"""
+
 get_dictionary_item = """query dictionaryItem(
     $dictionaryItemId: ID!
 ) {
@@ -277,3 +408,15 @@ languages = """query languages {
   }
 }
 """
+
+
+def batch(document: str, size: int) -> str:
+    operation, _, fragments = document.partition('\nfragment ')
+    header, _, selection = operation.partition('{')
+    kind, _, variables = header.partition('(')
+    variables = variables.strip().rstrip(')')
+    selection = selection.rpartition('}')[0].strip()
+    return (f"{kind.split()[0]} batch(" +
+            " ".join(re.sub(r'\$(\w+)', rf'$a{i}_\1', variables) for i in range(size)) + ") {\n" +
+            "\n".join(f"    a{i}: " + re.sub(r'\$(\w+)', rf'$a{i}_\1', selection) for i in range(size)) +
+            "\n}\n" + (f"\nfragment {fragments}" if fragments else ""))
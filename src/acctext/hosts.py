@@ -0,0 +1,77 @@
+import itertools
+import threading
+
+from typing import Callable, Dict, Iterable
+
+
+class HostPool:
+    strategies = {'least-outstanding', 'round-robin'}
+
+    def __init__(self, hosts: Iterable[str], strategy: str = 'least-outstanding', max_failures: int = 3):
+        if strategy not in self.strategies:
+            raise ValueError(f'Unknown balancing strategy {strategy}')
+        self.hosts = list(hosts)
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.outstanding = dict.fromkeys(self.hosts, 0)
+        self.failures = dict.fromkeys(self.hosts, 0)
+        self.healthy = set(self.hosts)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def pick(self, exclude: Iterable[str] = ()) -> str:
+        with self.lock:
+            candidates = [host for host in self.hosts if host not in exclude]
+            candidates = [host for host in candidates if host in self.healthy] or candidates or self.hosts
+            start = next(self.counter) % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            if self.strategy == 'round-robin':
+                return candidates[0]
+            return min(candidates, key=self.outstanding.__getitem__)
+
+    def acquire(self, host: str):
+        with self.lock:
+            self.outstanding[host] += 1
+
+    def release(self, host: str, ok: bool):
+        with self.lock:
+            self.outstanding[host] -= 1
+            if ok:
+                self.failures[host] = 0
+            else:
+                self.failures[host] += 1
+                if self.failures[host] >= self.max_failures:
+                    self.healthy.discard(host)
+
+    def mark(self, host: str, healthy: bool):
+        with self.lock:
+            if healthy:
+                self.healthy.add(host)
+                self.failures[host] = 0
+            else:
+                self.healthy.discard(host)
+
+    def start(self, check: Callable[[str], bool], interval: float):
+        def run():
+            while not self.stopped.wait(interval):
+                for host in self.hosts:
+                    try:
+                        healthy = check(host)
+                    except Exception:
+                        healthy = False
+                    self.mark(host, healthy)
+
+        self.thread = threading.Thread(target=run, name='acctext-health', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def stats(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {host: {"healthy": host in self.healthy,
+                           "outstanding": self.outstanding[host],
+                           "failures": self.failures[host]}
+                    for host in self.hosts}
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from typing import Dict
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial: int = 10, min_limit: int = 1, max_limit: int = 200, backoff: float = 0.75,
+                 latency_tolerance: float = 2.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.baselines = {}
+        self.in_flight = 0
+        self.waiting = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        return self.waiting
+
+    def acquire(self, timeout: float = None) -> float:
+        with self.condition:
+            self.waiting += 1
+            try:
+                if not self.condition.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                    raise TimeoutError('Timed out waiting for a request slot')
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, ok: bool, operation: str = None):
+        now = time.monotonic()
+        elapsed = now - started
+        with self.condition:
+            self.in_flight -= 1
+            baseline = self.baselines.get(operation)
+            if baseline is None or elapsed < baseline:
+                baseline = elapsed
+            else:
+                baseline += (elapsed - baseline) * 0.01
+            self.baselines[operation] = baseline
+            if not ok or elapsed > baseline * self.latency_tolerance:
+                if started >= self.last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def stats(self) -> Dict:
+        with self.condition:
+            return {"limit": int(self.limit),
+                    "in_flight": self.in_flight,
+                    "queue_depth": self.waiting,
+                    "baseline_latency": dict(self.baselines)}
@@ -0,0 +1,76 @@
+import bisect
+import threading
+
+from typing import Dict, Any, Optional
+from collections import defaultdict
+
+
+class Hook:
+    def before_request(self, request: Dict[str, Any]):
+        pass
+
+    def after_request(self, request: Dict[str, Any], response: Optional[Any], elapsed: float,
+                      error: Optional[Exception]):
+        pass
+
+    def count(self, name: str, operation: str, value: int = 1):
+        pass
+
+
+class Metrics(Hook):
+    buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self.latency_sums = defaultdict(float)
+        self.counters = defaultdict(int)
+
+    def count(self, name: str, operation: str, value: int = 1):
+        with self.lock:
+            self.counters[(name, operation)] += value
+
+    def after_request(self, request: Dict[str, Any], response: Optional[Any], elapsed: float,
+                      error: Optional[Exception]):
+        operation = request['operation']
+        received = int(response.headers.get('Content-Length', 0)) if response is not None else 0
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        with self.lock:
+            self.histograms[operation][bisect.bisect_left(self.buckets, elapsed)] += 1
+            self.latency_sums[operation] += elapsed
+            self.counters[('requests', operation)] += 1
+            self.counters[('bytes_sent', operation)] += request['bytes_sent']
+            self.counters[('bytes_received', operation)] += received
+            if retries is not None and retries.history:
+                self.counters[('retries', operation)] += len(retries.history)
+            if error is not None or response is None or response.status_code >= 500:
+                self.counters[('errors', operation)] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            operations = {operation for _, operation in self.counters} | set(self.histograms)
+            return {operation: dict({name: value for (name, op), value in self.counters.items() if op == operation},
+                                    latency={"buckets": dict(zip(self.buckets + (float('inf'),),
+                                                                 self.histograms[operation])),
+                                             "sum": self.latency_sums[operation]})
+                    for operation in sorted(operations)}
+
+    def prometheus(self, prefix: str = 'acctext') -> str:
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f'# TYPE {prefix}_{name}_total counter')
+                lines.extend(f'{prefix}_{name}_total{{operation="{operation}"}} {value}'
+                             for (n, operation), value in sorted(self.counters.items()) if n == name)
+            lines.append(f'# TYPE {prefix}_request_duration_seconds histogram')
+            for operation, counts in sorted(self.histograms.items()):
+                total = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    total += count
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(f'{prefix}_request_duration_seconds_bucket'
+                                 f'{{operation="{operation}",le="{le}"}} {total}')
+                lines.append(f'{prefix}_request_duration_seconds_sum{{operation="{operation}"}} '
+                             f'{self.latency_sums[operation]}')
+                lines.append(f'{prefix}_request_duration_seconds_count{{operation="{operation}"}} {total}')
+        return '\n'.join(lines) + '\n'
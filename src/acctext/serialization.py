@@ -0,0 +1,67 @@
+import json
+
+from importlib.util import find_spec
+from typing import Any, Callable, Iterable, Tuple, Union, BinaryIO
+
+backend = None
+dumps: Callable[[Any], Union[str, bytes]] = json.dumps
+loads: Callable[[Union[str, bytes]], Any] = json.loads
+streaming = find_spec('ijson') is not None
+
+
+def use(name: str = None):
+    global backend, dumps, loads
+    if name in {None, 'orjson'}:
+        try:
+            import orjson
+        except ImportError:
+            if name is not None:
+                raise
+        else:
+            def orjson_dumps(x: Any) -> bytes:
+                try:
+                    return orjson.dumps(x, option=orjson.OPT_NON_STR_KEYS)
+                except TypeError:
+                    return json.dumps(x).encode('utf-8')
+
+            backend, dumps, loads = 'orjson', orjson_dumps, orjson.loads
+            return
+    if name not in {None, 'json'}:
+        raise ValueError(f'Unknown JSON backend {name}')
+    backend, dumps, loads = 'json', json.dumps, json.loads
+
+
+def dumps_text(x: Any) -> str:
+    s = dumps(x)
+    return s.decode('utf-8') if isinstance(s, bytes) else s
+
+
+class Replay:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.chunks = []
+        self.recording = True
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.recording and self.chunks:
+            return self.chunks.pop(0)
+        chunk = self.f.read(size)
+        if self.recording:
+            self.chunks.append(chunk)
+        return chunk
+
+
+def split_items(f: BinaryIO, prefix: str) -> Tuple[Any, Iterable[Any]]:
+    import ijson
+
+    replay = Replay(f)
+    builder = ijson.ObjectBuilder()
+    for path, event, value in ijson.parse(replay, use_float=True):
+        if path == prefix and event == 'start_array':
+            replay.recording = False
+            return builder.value, ijson.items(replay, f'{prefix}.item', use_float=True)
+        builder.event(event, value)
+    return builder.value, iter(())
+
+
+use()
@@ -1,9 +1,9 @@
 import json
-import edn_format
-import io
-import csv
+import hashlib
 
-from typing import Dict
+from typing import Dict, Iterable, Any
+
+from acctext import serialization
 
 
 def dictionary_item(x: Dict) -> Dict:
@@ -15,6 +15,13 @@ def dictionary_item(x: Dict) -> Dict:
             "attributes": {attr.get('name'): attr.get('value') for attr in x.get('attributes', [])}}
 
 
+def dictionary_item_metadata(x: Dict) -> Dict:
+    return {"id": x.get('id'),
+            "key": x.get('name'),
+            "category": x.get('partOfSpeech'),
+            "language": x.get('language')}
+
+
 def dictionary_item_from_edn(x: Dict) -> Dict:
     return {"id": x['id'],
             "key": x['key'],
@@ -24,30 +31,83 @@ def dictionary_item_from_edn(x: Dict) -> Dict:
             "attributes": dict(x['attributes'])}
 
 
+def content_hash(x: Any) -> str:
+    return hashlib.sha256(json.dumps(x, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
 def document_plan(x: Dict) -> Dict:
-    x['documentPlan'] = json.loads(x['documentPlan'])
+    if 'documentPlan' in x:
+        x['documentPlan'] = serialization.loads(x['documentPlan'])
     return x
 
 
 def data_file(x: Dict) -> Dict:
+    positions = {name: i for i, name in enumerate(x['fieldNames'])}
+    width = len(positions)
+    rows = []
+    for record in x['records']:
+        row = [None] * width
+        for field in record['fields']:
+            row[positions[field['fieldName']]] = field['value']
+        rows.append(row)
+    return {"id": x['id'],
+            "filename": x['fileName'],
+            "header": x['fieldNames'],
+            "rows": rows}
+
+
+def data_file_metadata(x: Dict) -> Dict:
+    return {"id": x['id'],
+            "filename": x['fileName'],
+            "header": x['fieldNames'],
+            "record_count": x['recordCount']}
+
+
+def data_file_page(x: Dict) -> Dict:
+    return dict(data_file(x), record_count=x['recordCount'])
+
+
+def data_files_page(x: Dict) -> Dict:
+    return {"data_files": [data_file_metadata(f) for f in x['dataFiles']],
+            "total_count": x['totalCount']}
+
+
+def data_file_columns(x: Dict) -> Dict:
+    records = x['records']
+    columns = {name: [None] * len(records) for name in x['fieldNames']}
+    for i, record in enumerate(records):
+        for field in record['fields']:
+            columns[field['fieldName']][i] = field['value']
     return {"id": x['id'],
             "filename": x['fileName'],
             "header": x['fieldNames'],
-            "rows": [[field['value'] for field in sorted(record['fields'],
-                                                         key=lambda f: x['fieldNames'].index(f['fieldName']))]
-                     for record in x['records']]}
+            "columns": columns}
 
 
 def data_file_to_csv(x: Dict) -> str:
+    return ''.join(data_file_to_csv_chunks(x))
+
+
+def data_file_to_csv_chunks(x: Dict, chunk_size: int = 65536) -> Iterable[str]:
+    import csv
+    import io
+
     output = io.StringIO()
     writer = csv.writer(output, quoting=csv.QUOTE_NONNUMERIC)
     writer.writerow(x['header'])
     for row in x['rows']:
         writer.writerow(row)
-    return output.getvalue()
+        if output.tell() >= chunk_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    yield output.getvalue()
 
 
 def data_file_from_csv(filename: str, x: bytes) -> Dict:
+    import csv
+    import io
+
     f = io.StringIO(x.decode('utf-8'))
     rows = list(csv.reader(f, delimiter=','))
     return {"id": filename,
@@ -64,6 +124,8 @@ def reader_flag(x: Dict) -> Dict:
 
 
 def reader_flag_to_edn(x: Dict) -> Dict:
+    import edn_format
+
     return {edn_format.Keyword('data.spec.reader-model/code'): x['id'],
             edn_format.Keyword('data.spec.reader-model/flag'): x['flag'],
             edn_format.Keyword('data.spec.reader-model/name'): x['name'],
@@ -72,6 +134,8 @@ def reader_flag_to_edn(x: Dict) -> Dict:
 
 
 def reader_flag_from_edn(x: Dict) -> Dict:
+    import edn_format
+
     return {"id": x[edn_format.Keyword('data.spec.reader-model/code')],
             'name': x[edn_format.Keyword('data.spec.reader-model/name')],
             'flag': x[edn_format.Keyword('data.spec.reader-model/flag')],
@@ -0,0 +1,17 @@
+import pytest
+
+from acctext.core import AcceleratedText
+from benchmarks.server import FakeServer
+
+
+@pytest.fixture
+def server():
+    with FakeServer(port=0) as server:
+        yield server
+
+
+@pytest.fixture
+def at(server):
+    at = AcceleratedText(server.url, poll_interval=0.005, max_poll_interval=0.02)
+    yield at
+    at.close()
@@ -0,0 +1,17 @@
+import asyncio
+
+from acctext.aio import AsyncAcceleratedText
+
+
+def test_client_created_outside_the_loop_limits_concurrency(server):
+    server.latency = 0.02
+    at = AsyncAcceleratedText(server.url, concurrency=2)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(at.health() for _ in range(10)))
+        finally:
+            await at.close()
+
+    for _ in range(2):
+        assert asyncio.run(run()) == [{"health": "Ok"}] * 10
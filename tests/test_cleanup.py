@@ -0,0 +1,59 @@
+import time
+
+from acctext.cleanup import ResultReleaser
+from acctext.core import AcceleratedText
+
+
+def test_releaser_survives_failing_deletes():
+    deleted = []
+
+    def delete(id):
+        if id == 'bad':
+            raise ValueError('not JSON')
+        deleted.append(id)
+        return True
+
+    releaser = ResultReleaser(delete, interval=0.01)
+    releaser.release(['a', 'bad', 'b'])
+    releaser.flush()
+    assert releaser.thread.is_alive()
+    releaser.release(['c'])
+    releaser.flush()
+    assert sorted(deleted) == ['a', 'b', 'c']
+    assert releaser.stats() == {"pending": 0, "released": 3, "failed": 1}
+    releaser.close()
+
+
+def test_consumed_results_are_released(server):
+    with AcceleratedText(server.url, poll_interval=0.005, release_results=True) as at:
+        results = list(at.generate_bulk('plan', [{"n": n} for n in range(20)]))
+        at.releaser.flush()
+        assert len(results) == 20 and server.state.results == {}
+        assert at.unreleased == {}
+
+
+def test_sweep_reports_deletes_that_raise(server, monkeypatch):
+    with AcceleratedText(server.url, release_results=True) as at:
+        at._submit_bulk('plan', [{"n": 1}], None)
+        monkeypatch.setattr(at, 'delete_result', lambda id: (_ for _ in ()).throw(TimeoutError()))
+        swept = at.sweep_results(older_than=0)
+        assert swept['deleted'] == [] and len(swept['failed']) == 1
+
+
+def test_sweep_skips_recent_jobs_by_default(server):
+    with AcceleratedText(server.url, poll_interval=0.005, release_results=True) as at:
+        results = at.generate_bulk('plan', [{"n": n} for n in range(5)])
+        assert at.sweep_results() == {"deleted": [], "failed": []}
+        assert all(result['ready'] for result in results)
+
+
+def test_sweep_skips_results_being_polled(server):
+    with AcceleratedText(server.url, poll_interval=0.005, release_results=True) as at:
+        data_rows = at._submit_bulk('plan', [{"n": n} for n in range(3)], None)
+        first, *rest = data_rows
+        for id in rest:
+            server.state.results[id]['readyAt'] = time.time() + 0.3
+        results = at.get_results(data_rows, ordered=False)
+        assert next(results)['resultId'] == first
+        assert not set(rest) & set(at.sweep_results(older_than=0)['deleted'])
+        assert all(result['ready'] for result in results)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from acctext.aio import AsyncAcceleratedText
+
+
+@pytest.fixture
+def files(server):
+    server.state.add_data_file('a.csv', 'a.csv', 'x,y\n1,2\n3,4\n5,6\n7,8\n')
+    server.state.add_data_file('b.csv', 'b.csv', 'z\n9\n')
+    server.state.requests = 0
+    return server
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_rows_stop_at_record_count(at, files, prefetch):
+    rows = list(at.iter_data_file_rows('a.csv', page_size=2, prefetch=prefetch))
+    assert rows == [['1', '2'], ['3', '4'], ['5', '6'], ['7', '8']]
+    assert files.state.requests == 2
+
+
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_data_files_stop_at_total_count(at, files, prefetch):
+    data_files = [(f['id'], list(f['rows'])) for f in at.iter_data_files(page_size=1, record_page_size=3,
+                                                                         prefetch=prefetch)]
+    assert data_files == [('a.csv', [['1', '2'], ['3', '4'], ['5', '6'], ['7', '8']]), ('b.csv', [['9']])]
+    assert files.state.requests == 5
+
+
+def test_missing_data_file_raises(at, files):
+    with pytest.raises(Exception, match='missing.csv not found'):
+        next(at.iter_data_file_rows('missing.csv'))
+
+
+def test_async_rows_stop_at_record_count(files):
+    async def rows():
+        async with AsyncAcceleratedText(files.url) as at:
+            return [row async for row in at.iter_data_file_rows('a.csv', page_size=2, prefetch=True)]
+
+    assert asyncio.run(rows()) == [['1', '2'], ['3', '4'], ['5', '6'], ['7', '8']]
+    assert files.state.requests == 2
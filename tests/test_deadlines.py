@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from acctext import metrics
+from acctext.core import AcceleratedText
+from acctext.limits import AdaptiveLimiter
+
+
+def test_tuple_timeout_with_unbounded_read_is_clamped(server):
+    server.latency = 1.0
+    with AcceleratedText(server.url, timeout=(3.05, None)) as at:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            at.generate('plan', {"a": 1}, deadline=0.2)
+        assert time.monotonic() - start < 0.5
+
+
+class Counter(metrics.Hook):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, name: str, operation: str, value: int = 1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+
+def test_hedge_counters_match_hooks_under_concurrency(server):
+    server.latency = 0.005
+    counter = Counter()
+    with AcceleratedText(server.url, pool_size=20, hedge_percentile=1, hedge_min_samples=1, hooks=[counter]) as at:
+        at.generate('plan', {"warm": 1})
+        threads = [threading.Thread(target=lambda i=i: [at.generate('plan', {"t": i, "n": n}) for n in range(10)])
+                   for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert at.hedges_fired > 0
+        assert at.hedges_fired == counter.counts.get('hedges_fired', 0)
+        assert at.hedges_won == counter.counts.get('hedges_won', 0)
+
+
+def test_deadline_bounds_limiter_waits_in_poll_workers(server):
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    with AcceleratedText(server.url, limiter=limiter) as at:
+        ids = list(at._submit_bulk('plan', [{"n": 1}, {"n": 2}], None))
+        limiter.acquire()
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            list(at.get_results(ids, deadline=0.2))
+        assert time.monotonic() - start < 0.5
+        assert limiter.queue_depth == 0
+
+
+def test_client_deadline_applies_to_bulk_submission(server):
+    server.latency = 1.0
+    with AcceleratedText(server.url, deadline=0.2) as at:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            at.generate_bulk('plan', [{"n": 1}])
+        assert time.monotonic() - start < 0.5
+
+
+def test_bulk_deadline_covers_polling(server):
+    server.realisation_time = 60.0
+    with AcceleratedText(server.url, poll_interval=0.005) as at:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            list(at.generate_bulk('plan', [{"n": n} for n in range(3)], deadline=0.3))
+        with pytest.raises(TimeoutError):
+            list(at.generate_bulk_stream('plan', [{"n": n} for n in range(3)], deadline=0.3))
+        assert time.monotonic() - start < 1.5
@@ -0,0 +1,14 @@
+import pytest
+
+
+def test_dictionary_metadata_omits_forms_and_attributes(at):
+    at.create_dictionary_item('house', 'N', forms=['house', 'houses'])
+    [item] = at.list_dictionary_items(fields='metadata')
+    assert set(item) == {'id', 'key', 'category', 'language'}
+    assert item['key'] == 'house'
+
+
+@pytest.mark.parametrize('method', ['list_data_files', 'list_dictionary_items', 'list_document_plans'])
+def test_unknown_fields_raise_value_error(at, method):
+    with pytest.raises(ValueError):
+        getattr(at, method)(fields='everything')
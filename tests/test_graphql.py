@@ -0,0 +1,31 @@
+from acctext import graphql
+
+
+def test_batch_aliases_each_operation():
+    query = graphql.batch(graphql.delete_dictionary_item, 2)
+    assert query.startswith('mutation batch(')
+    assert '$a0_id' in query and '$a1_id' in query
+    assert 'a0: deleteDictionaryItem(id: $a0_id)' in query
+    assert 'a1: deleteDictionaryItem(id: $a1_id)' in query
+
+
+def test_batch_maps_errors_to_their_items(at, server):
+    resolve = server.state.resolve
+
+    def failing(field, args):
+        if args.get('id') == 'bad':
+            raise ValueError('rejected')
+        return resolve(field, args)
+
+    server.state.resolve = failing
+    results = at.delete_languages(['Eng', 'bad', 'missing'], batch_size=2)
+    assert results[0] is True
+    assert isinstance(results[1], Exception) and 'rejected' in str(results[1])
+    assert results[2] is False
+
+
+def test_batch_applies_unpathed_errors_to_every_item(at, server):
+    server.state.graphql = lambda body: {"data": None, "errors": [{"message": "boom"}]}
+    results = at.delete_languages(['a', 'b', 'c'], batch_size=2)
+    assert len(results) == 3
+    assert all(isinstance(r, Exception) and 'boom' in str(r) for r in results)
@@ -0,0 +1,39 @@
+import socket
+
+import pytest
+
+from acctext.core import AcceleratedText
+from benchmarks.server import FakeServer
+
+
+@pytest.fixture
+def dead():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f'http://127.0.0.1:{port}/'
+
+
+@pytest.mark.parametrize('balancing', ['round-robin', 'least-outstanding'])
+def test_bulk_jobs_fail_over_and_poll_the_accepting_host(server, dead, balancing):
+    with AcceleratedText([dead, server.url], retries=0, balancing=balancing, health_interval=None,
+                         poll_interval=0.005) as at:
+        for n in range(4):
+            results = list(at.generate_bulk('plan', [{"n": n}, {"n": n + 10}]))
+            assert all(result['ready'] for result in results)
+        assert set(at.pinned.values()) == {server.url}
+
+
+def test_bulk_jobs_are_pinned_to_their_host():
+    with FakeServer() as a, FakeServer() as b:
+        with AcceleratedText([a.url, b.url], balancing='round-robin', health_interval=None,
+                             poll_interval=0.005) as at:
+            for n in range(4):
+                assert all(result['ready'] for result in at.generate_bulk('plan', [{"n": n}]))
+            assert len(a.state.results) == len(b.state.results) == 2
+
+
+def test_generate_fails_over_to_a_live_host(server, dead):
+    with AcceleratedText([dead, server.url], retries=0, balancing='round-robin', health_interval=None) as at:
+        assert all(at.generate('plan', {"n": n})['ready'] for n in range(4))
+        assert not at.host_stats()[dead]['healthy']
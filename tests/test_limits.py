@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+from acctext.core import AcceleratedText
+from acctext.limits import AdaptiveLimiter
+
+
+def test_acquire_times_out_and_leaves_queue():
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    started = limiter.acquire()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.05)
+    assert limiter.stats()['in_flight'] == 1 and limiter.queue_depth == 0
+    limiter.release(started, True)
+    limiter.acquire(timeout=0.05)
+
+
+def test_deadline_bounds_wait_for_a_slot(server):
+    limiter = AdaptiveLimiter(initial=1, max_limit=1)
+    with AcceleratedText(server.url, limiter=limiter) as at:
+        limiter.acquire()
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            at.generate('plan', {"a": 1}, deadline=0.2)
+        assert time.monotonic() - start < 0.5
+        assert limiter.queue_depth == 0
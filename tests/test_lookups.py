@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from acctext.cache import LookupCache
+from acctext.core import AcceleratedText
+
+
+def test_concurrent_misses_share_one_load():
+    lookups = LookupCache()
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lookups.get('k', load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{"value": 1}] * 8
+    assert len(calls) == 1
+    assert lookups.stats()['coalesced'] == 7
+
+
+def test_failing_validation_serves_cached_value():
+    lookups = LookupCache()
+    lookups.get('k', lambda: {"value": 1})
+
+    def broken(value):
+        raise ValueError('unreachable')
+
+    assert lookups.get('k', lambda: {"value": 2}, valid=broken) == {"value": 1}
+
+
+@pytest.fixture
+def plans(server, monkeypatch):
+    with AcceleratedText(server.url, lookups=LookupCache(revalidate_interval=0.2)) as at:
+        at.create_document_plan('p1', 'u1', 'Plan', 'Document', [], '<xml/>', {"v": 1})
+        monkeypatch.setattr(at, 'list_document_plans', lambda *args, **kwargs: pytest.fail('listed all plans'))
+        yield at
+
+
+def test_document_plan_revalidates_by_id(plans, server):
+    assert plans.get_document_plan(id='p1')['documentPlan'] == {"v": 1}
+    server.state.requests = 0
+    assert plans.get_document_plan(id='p1')['documentPlan'] == {"v": 1}
+    assert server.state.requests == 1
+    server.state.resolve('updateDocumentPlan', {"id": 'p1', "documentPlan": '{"v": 2}'})
+    assert plans.get_document_plan(id='p1')['documentPlan'] == {"v": 1}
+    time.sleep(0.25)
+    assert plans.get_document_plan(id='p1')['documentPlan'] == {"v": 2}
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+
+def store(server, delays):
+    now = time.time()
+    for id, delay in delays.items():
+        server.state.results[id] = {"variants": [id], "readyAt": now + delay}
+    return list(delays)
+
+
+def test_results_keep_input_order(at, server):
+    ids = store(server, {"a": 0.3, "b": 0.0, "c": 0.15})
+    assert [r['variants'] for r in at.get_results(ids)] == [["a"], ["b"], ["c"]]
+
+
+def test_unordered_results_follow_completion(at, server):
+    ids = store(server, {"a": 0.3, "b": 0.0, "c": 0.15})
+    assert [r['variants'] for r in at.get_results(ids, ordered=False)] == [["b"], ["c"], ["a"]]
+
+
+def test_results_time_out(at, server):
+    ids = store(server, {"a": 0.0, "b": 60.0})
+    start = time.monotonic()
+    results = at.get_results(ids, ordered=False, timeout=0.2)
+    assert next(results)['variants'] == ["a"]
+    with pytest.raises(TimeoutError, match='1 of 2'):
+        next(results)
+    assert time.monotonic() - start < 1.0
+
+
+def test_missing_result_is_returned_as_response(at, server):
+    [r] = at.get_results(['missing'])
+    assert r.status_code == 404
+
+
+def test_bulk_fans_out_duplicate_rows(at, server):
+    rows = [{"n": 1}, {"n": 2}, {"n": 1}, {"n": 1}]
+    results = list(at.generate_bulk('plan', rows))
+    assert [r['variants'] for r in results] == [[server.realise('plan', row)['variants'][0]] for row in rows]
+    assert at.duplicates_removed == 2
+    assert len(server.state.results) == 2
+
+
+def test_pool_stats_counts_each_connection_once(at):
+    for _ in range(5):
+        at.health()
+    assert at.pool_stats() == {"connections": 1, "requests": 5, "reused": 4}
+
+
+def test_timeout_does_not_wait_for_slow_polls(at, server):
+    ids = store(server, {"a": 0.0, "b": 0.0})
+    server.latency = 2.0
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        list(at.get_results(ids, timeout=0.3))
+    assert time.monotonic() - start < 1.0
+
+
+def test_deadline_does_not_wait_for_slow_polls(at, server):
+    ids = store(server, {"a": 0.0, "b": 0.0})
+    server.latency = 2.0
+    start = time.monotonic()
+    with at.deadline(0.3), pytest.raises(TimeoutError):
+        list(at.get_results(ids))
+    assert time.monotonic() - start < 1.0
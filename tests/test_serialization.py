@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+
+from acctext import serialization
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def backend(request):
+    serialization.use(request.param)
+    yield request.param
+    serialization.use()
+
+
+def test_generate_accepts_non_string_keys(at, server, backend):
+    result = at.generate('plan', {1: 'a', 'b': 2})
+    assert result['variants'] == server.realise('plan', {"1": 'a', "b": 2})['variants']
+
+
+def test_dumps_falls_back_for_values_orjson_rejects(backend):
+    assert json.loads(serialization.dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+
+def test_split_items_returns_head_and_items():
+    doc = json.dumps({"data": {"f": {"id": "a", "items": [{"n": 1}, {"n": 2.5}], "count": 2}}}).encode('utf-8')
+    head, items = serialization.split_items(io.BytesIO(doc), 'data.f.items')
+    assert head == {"data": {"f": {"id": "a"}}}
+    assert list(items) == [{"n": 1}, {"n": 2.5}]
+
+
+@pytest.fixture
+def data_file(server):
+    server.state.add_data_file('a.csv', 'a.csv', 'x,y\n1,2\n3,4\n')
+    server.state.requests = 0
+    return server
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_get_data_file_makes_one_request(at, data_file, monkeypatch, streaming):
+    monkeypatch.setattr(serialization, 'streaming', streaming)
+    assert at.get_data_file('a.csv') == {"id": "a.csv", "filename": "a.csv", "header": ["x", "y"],
+                                         "rows": [["1", "2"], ["3", "4"]]}
+    assert at.get_data_file('missing.csv') is None
+    assert data_file.state.requests == 2
+
+
+def test_streamed_data_file_raises_graphql_errors(at, data_file, monkeypatch):
+    monkeypatch.setattr(serialization, 'streaming', True)
+    data_file.state.graphql = lambda body: {"errors": [{"message": "boom"}], "data": {"getDataFile": None}}
+    with pytest.raises(Exception, match='boom'):
+        at.get_data_file('a.csv')
+
+
+def test_streamed_data_file_honours_deadline(at, data_file, monkeypatch):
+    monkeypatch.setattr(serialization, 'streaming', True)
+    data_file.latency = 1.0
+    with at.deadline(0.2), pytest.raises(TimeoutError):
+        at.get_data_file('a.csv')
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+import requests
+
+
+@pytest.fixture
+def delayed(at, server, monkeypatch):
+    submit = at._submit_bulk
+    submitted = []
+
+    def delayed_submit(document_plan_name, batch, reader_model, expires=None):
+        if any(row.get('fail') for row in batch):
+            r = requests.Response()
+            r.status_code = 503
+            return r
+        data_rows = submit(document_plan_name, batch, reader_model, expires)
+        submitted.append(len(server.state.results))
+        now = time.time()
+        for id, row in data_rows.items():
+            server.state.results[id]['readyAt'] = now + row['delay']
+        return data_rows
+
+    monkeypatch.setattr(at, '_submit_bulk', delayed_submit)
+    return submitted
+
+
+def stream(at, rows, **kwargs):
+    return [(row['n'], result) for row, result in at.generate_bulk_stream('plan', rows, batch_size=2, **kwargs)]
+
+
+def test_unordered_stream_interleaves_batches(at, delayed):
+    rows = [{"n": 0, "delay": 0.4}, {"n": 1, "delay": 0.4}, {"n": 2, "delay": 0.0}, {"n": 3, "delay": 0.0}]
+    assert sorted(n for n, _ in stream(at, rows, ordered=False)[:2]) == [2, 3]
+
+
+def test_ordered_stream_keeps_input_order(at, delayed):
+    rows = [{"n": n, "delay": 0.2 if n < 2 else 0.0} for n in range(7)]
+    results = stream(at, rows)
+    assert [n for n, _ in results] == list(range(7))
+    assert all(result['ready'] for _, result in results)
+
+
+def test_stream_refills_as_batches_finish(at, delayed):
+    rows = [{"n": n, "delay": 0.0} for n in range(6)]
+    assert sorted(n for n, _ in stream(at, rows, max_in_flight=1, ordered=False)) == list(range(6))
+    assert len(delayed) == 3
+
+
+def test_failed_submission_yields_response_in_place(at, delayed):
+    rows = [{"n": 0, "delay": 0.1}, {"n": 1, "delay": 0.1}, {"n": 2, "fail": True}, {"n": 3, "fail": True},
+            {"n": 4, "delay": 0.0}]
+    results = stream(at, rows, max_in_flight=1)
+    assert [n for n, _ in results] == [0, 1, 2, 3, 4]
+    assert [type(result) == requests.Response for _, result in results] == [False, False, True, True, False]
+
+
+def test_stream_times_out_per_batch(at, delayed):
+    rows = [{"n": 0, "delay": 0.0}, {"n": 1, "delay": 0.0}, {"n": 2, "delay": 60.0}]
+    results = at.generate_bulk_stream('plan', rows, batch_size=2, ordered=False, timeout=0.3)
+    assert sorted(row['n'] for row, _ in (next(results), next(results))) == [0, 1]
+    with pytest.raises(TimeoutError):
+        next(results)
+
+
+def test_ordered_stream_bounds_rows_read_ahead(at, delayed):
+    read = []
+
+    def rows():
+        for n in range(200):
+            read.append(n)
+            yield {"n": n, "delay": 0.5 if n == 0 else 0.0}
+
+    results = at.generate_bulk_stream('plan', rows(), batch_size=10, max_in_flight=2)
+    row, _ = next(results)
+    assert row['n'] == 0 and len(read) <= 2 * 10 + 1
+    assert [row['n'] for row, _ in results] == list(range(1, 200))
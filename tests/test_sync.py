@@ -0,0 +1,39 @@
+import json
+import zipfile
+
+import pytest
+
+
+@pytest.fixture
+def archive(at, server, tmp_path):
+    server.state.add_data_file('a.csv', 'a.csv', 'x,y\n1,2\n3,4\n')
+    server.state.add_data_file('b.csv', 'b.csv', 'z\n9\n')
+    path = str(tmp_path / 'state.zip')
+    at.export_state(path)
+    server.state.add_data_file('b.csv', 'b.csv', 'z\n9\n10\n')
+    server.state.add_data_file('c.csv', 'c.csv', 'w\n1\n')
+    return path
+
+
+def without_record_counts(path: str) -> str:
+    with zipfile.ZipFile(path, 'r') as source:
+        entries = {name: source.read(name) for name in source.namelist()}
+    manifest = json.loads(entries['manifest.json'])
+    del manifest['data-file-records']
+    entries['manifest.json'] = json.dumps(manifest)
+    with zipfile.ZipFile(path, 'w') as target:
+        for name, content in entries.items():
+            target.writestr(name, content)
+    return path
+
+
+@pytest.mark.parametrize('legacy', [False, True])
+def test_sync_downloads_only_files_with_matching_record_counts(at, archive, monkeypatch, legacy):
+    if legacy:
+        without_record_counts(archive)
+    fetched = []
+    data_file_page = at._data_file_page
+    monkeypatch.setattr(at, '_data_file_page', lambda id, *args: fetched.append(id) or data_file_page(id, *args))
+    summary = at.sync_state(archive, dry_run=True)
+    assert summary['data-files'] == {"created": [], "updated": ['b.csv'], "deleted": ['c.csv'], "failed": []}
+    assert set(fetched) == {'a.csv'}
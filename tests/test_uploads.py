@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.server import Handler
+
+
+@pytest.fixture
+def busy_once(monkeypatch):
+    route = Handler.route
+    bodies = []
+
+    def busy(self, method):
+        if (method, self.path) == ('POST', '/accelerated-text-data-files/') and not bodies:
+            bodies.append(self.read_body())
+            return {"message": "busy"}, 503
+        return route(self, method)
+
+    monkeypatch.setattr(Handler, 'route', busy)
+    return bodies
+
+
+def test_streamed_upload_is_not_retried_with_an_empty_body(at, server, busy_once):
+    r = at.upload_rows('a.csv', ['x', 'y'], [[1, 2], [3, 4]])
+    assert r.status_code == 503
+    assert b'3,4' in busy_once[0]
+    assert 'a.csv' not in server.state.data_files
+    assert at.upload_rows('a.csv', ['x', 'y'], [[1, 2], [3, 4]])['id'] == 'a.csv'
+    assert server.state.data_files['a.csv']['rows'] == [['1', '2'], ['3', '4']]